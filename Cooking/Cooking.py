@@ -1,12 +1,21 @@
 import tkinter as tk
 from tkinter import ttk
 from tkinter import messagebox, simpledialog
-import json
 import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from record_store import CorruptDataError, Record, RecordStore  # noqa: E402
 
 #TODO
 # add calories and protein to recipes
 
+class Recipe(Record):
+    __slots__ = ("name", "ingredients", "instructions", "ingredient_count")
+
 class CookingApp:
     def __init__(self, root):
         # Initialize the Cooking app with dark mode and UI setup
@@ -35,7 +44,11 @@ class CookingApp:
                       background=[("selected", self.accent_color), ("!selected", "#444444")],
                       foreground=[("selected", "#ffffff"), ("!selected", "#ffffff")])
         
-        self.recipes = self.load_recipes()
+        # recipes are keyed by name; duplicate names in old files get a " (n)" suffix
+        self.recipes = RecordStore(os.path.join("Cooking", "recipes.json"), Recipe, key="name",
+                                   make_key=lambda r, n: f"{r.get('name', 'Recipe')} ({n})")
+        self.recipes.add_index("name", lambda r: r["name"])
+        self.load_recipes()
         self.create_widgets()
         
     def create_widgets(self):
@@ -161,27 +174,22 @@ class CookingApp:
             messagebox.showwarning("Warning", "Instructions cannot be empty!")
             return
         
-        editing = False
-        for i, recipe in enumerate(self.recipes):
-            if recipe["name"] == self.editing_recipe_name if hasattr(self, 'editing_recipe_name') else None:
-                self.recipes[i] = {
-                    "name": recipe_name,
-                    "ingredients": ingredients,
-                    "instructions": instructions,
-                    "ingredient_count": len(ingredients.split('\n'))
-                }
-                editing = True
-                if hasattr(self, 'editing_recipe_name'):
-                    delattr(self, 'editing_recipe_name')
-                break
-        
-        if not editing:
-            self.recipes.append({
-                "name": recipe_name,
-                "ingredients": ingredients,
-                "instructions": instructions,
-                "ingredient_count": len(ingredients.split('\n'))
-            })
+        editing_name = getattr(self, 'editing_recipe_name', None)
+        if recipe_name != editing_name and recipe_name in self.recipes:
+            if not messagebox.askyesno("Replace Recipe",
+                                       f"A recipe named '{recipe_name}' already exists. Replace it?"):
+                return
+        if editing_name is not None and editing_name != recipe_name:
+            # renamed: the name is the key, so drop the old entry
+            self.recipes.delete(editing_name)
+        self.recipes.put({
+            "name": recipe_name,
+            "ingredients": ingredients,
+            "instructions": instructions,
+            "ingredient_count": len(ingredients.split('\n'))
+        })
+        if hasattr(self, 'editing_recipe_name'):
+            delattr(self, 'editing_recipe_name')
         
         self.save_recipes()
         self.clear_form()
@@ -199,33 +207,23 @@ class CookingApp:
     def load_recipes(self):
         # Load recipes from the JSON file
         try:
-            if not os.path.exists("Cooking"):
-                os.makedirs("Cooking")
-                
-            if os.path.exists("Cooking/recipes.json"):
-                with open("Cooking/recipes.json", "r") as file:
-                    return json.load(file)
-            return []
+            self.recipes.load()
+        except CorruptDataError as e:
+            messagebox.showerror("Error", str(e))
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load recipes: {str(e)}")
-            return []
     
     def save_recipes(self):
-        # Save recipes to the JSON file
+        # Write the recipes changed since the last save to the store's journal
         try:
-            if not os.path.exists("Cooking"):
-                os.makedirs("Cooking")
-                
-            with open("Cooking/recipes.json", "w") as file:
-                json.dump(self.recipes, file, indent=4)
+            self.recipes.flush()
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save recipes: {str(e)}")
     
     def load_recipe_list(self):
         # Load the recipe list into the UI
         self.recipe_list.delete(0, tk.END)
-        sorted_recipes = sorted(self.recipes, key=lambda x: x["name"])
-        for recipe in sorted_recipes:
+        for recipe in self.recipes.ordered("name"):
             ingredient_count = recipe.get("ingredient_count", len(recipe["ingredients"].split('\n')))
             self.recipe_list.insert(tk.END, f"{recipe['name']} | {ingredient_count} ingredients")
     
@@ -277,10 +275,7 @@ class CookingApp:
             confirm = messagebox.askyesno("Confirm Delete", 
                                         f"Are you sure you want to delete the recipe '{recipe_name}'?")
             if confirm:
-                for i, recipe in enumerate(self.recipes):
-                    if recipe["name"] == recipe_name:
-                        del self.recipes[i]
-                        break
+                self.recipes.delete(recipe_name)
                 self.save_recipes()
                 self.load_recipe_list()
                 messagebox.showinfo("Success", f"Recipe '{recipe_name}' deleted!")
@@ -289,10 +284,7 @@ class CookingApp:
     
     def find_recipe_by_name(self, name):
         # Find a recipe by its name
-        for recipe in self.recipes:
-            if recipe["name"] == name:
-                return recipe
-        return None
+        return self.recipes.get(name)
     
     def show_recipe_window(self, recipe):
         # Show the full recipe details in a new window
@@ -408,4 +400,5 @@ class CookingApp:
 if __name__ == "__main__":
     root = tk.Tk()
     app = CookingApp(root)
-    root.mainloop()
\ No newline at end of file
+    root.mainloop()
+    app.recipes.close()
\ No newline at end of file
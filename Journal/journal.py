@@ -1,8 +1,28 @@
 import tkinter as tk
 from tkinter import ttk
 from tkinter import messagebox
-import json
-from datetime import datetime
+import os
+import sys
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from record_store import CorruptDataError, Record, RecordStore  # noqa: E402
+
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+class Entry(Record):
+    __slots__ = ("date", "content", "word_count", "flagged")
+
+def later_date(entry, seconds):
+    # the date is the key, so a repeated one moves forward rather than being renamed
+    try:
+        when = datetime.strptime(entry.get("date", ""), DATE_FORMAT)
+    except ValueError:
+        when = datetime(1970, 1, 1)
+    return (when + timedelta(seconds=seconds)).strftime(DATE_FORMAT)
 
 class JournalApp:
     def __init__(self, root):
@@ -31,7 +51,11 @@ class JournalApp:
                       background=[("selected", self.accent_color), ("!selected", "#444444")],
                       foreground=[("selected", "#ffffff"), ("!selected", "#ffffff")])
         
-        self.entries = self.load_entries()
+        # entries are keyed by their timestamp, newest first in the list
+        self.entries = RecordStore(os.path.join("Journal", "journal_entries.json"), Entry, key="date",
+                                   make_key=later_date)
+        self.entries.add_index("newest", lambda e: e["date"], reverse=True)
+        self.load_entries()
         
         self.create_widgets()
         
@@ -95,9 +119,13 @@ class JournalApp:
     def save_entry(self):
         entry_content = self.entry_text.get("1.0", tk.END).rstrip()
         if entry_content:
-            entry_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            now = datetime.now()
+            entry_date = now.strftime(DATE_FORMAT)
+            while entry_date in self.entries:
+                now += timedelta(seconds=1)
+                entry_date = now.strftime(DATE_FORMAT)
             word_count = len(entry_content.split())
-            self.entries.append({
+            self.entries.put({
                 "date": entry_date,
                 "content": entry_content,
                 "word_count": word_count,
@@ -112,21 +140,18 @@ class JournalApp:
     
     def load_entries(self):
         try:
-            with open('Journal/journal_entries.json', 'r') as file:
-                return json.load(file)
+            self.entries.load()
         except FileNotFoundError:
-            return []
+            pass
+        except CorruptDataError as e:
+            messagebox.showerror("Error", str(e))
     
     def save_entries(self):
-        with open('Journal/journal_entries.json', 'w') as file:
-            json.dump(self.entries, file, indent=4)
+        self.entries.flush()
     
     def load_journal_list(self):
         self.journal_list.delete(0, tk.END)
-        sorted_entries = sorted(self.entries,
-                                key=lambda x: x['date'],
-                                reverse=True)
-        for entry in sorted_entries:
+        for entry in self.entries.ordered("newest"):
             marker = "★ " if entry.get("flagged") else ""
             self.journal_list.insert(
                 tk.END,
@@ -136,14 +161,14 @@ class JournalApp:
     def open_entry(self):
         selected_index = self.journal_list.curselection()
         if selected_index:
-            sorted_entries = sorted(self.entries, key=lambda x: x['date'], reverse=True)
-            entry = sorted_entries[selected_index[0]]
+            entry = self.entries.at("newest", selected_index[0])
             self.show_entry_window(entry)
         else:
             messagebox.showwarning("Warning", "No entry selected!")
     
     def toggle_flag(self, entry):
         entry["flagged"] = not entry.get("flagged", False)
+        self.entries.put(entry)
         self.save_entries()
         self.load_journal_list()
     
@@ -211,14 +236,8 @@ class JournalApp:
         if selected_index:
             confirm = messagebox.askyesno("Confirm Delete", "Are you sure you want to delete this entry?")
             if confirm:
-                sorted_entries = sorted(self.entries, key=lambda x: x['date'], reverse=True)
-                entry_to_delete = sorted_entries[selected_index[0]]
-                
-                for i, entry in enumerate(self.entries):
-                    if entry['date'] == entry_to_delete['date']:
-                        del self.entries[i]
-                        break
-                
+                entry_to_delete = self.entries.at("newest", selected_index[0])
+                self.entries.delete(entry_to_delete['date'])
                 self.save_entries()
                 self.load_journal_list()
                 messagebox.showinfo("Success", "Journal entry deleted!")
@@ -228,4 +247,5 @@ class JournalApp:
 if __name__ == "__main__":
     root = tk.Tk()
     app = JournalApp(root)
-    root.mainloop()
\ No newline at end of file
+    root.mainloop()
+    app.entries.close()
\ No newline at end of file
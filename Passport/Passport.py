@@ -1,11 +1,92 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import json
 import os
+import queue
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from PIL import Image, ImageTk
 
-IMAGE_EXTS = {".jpg", ".jpeg", ".png", ".gif", ".bmp", ".tiff", ".webp"}
+from passport_core import (
+    CATEGORIES,
+    SHEET_ROWS,
+    CorruptDataError,
+    PassportCore,
+    iter_import_file,
+)
+
+GALLERY_POLL_MS = 30
+GALLERY_FILLS_PER_TICK = 24
+GALLERY_OVERSCAN_ROWS = 2
+GALLERY_PHOTO_POOL = 200
+VIEWER_FRAME_CACHE = 8
+VIEWER_PREFETCH = (1, -1, 2)
+VIEWER_RESIZE_DEBOUNCE_MS = 120
+SEARCH_DEBOUNCE_MS = 150
+SCAN_BATCH = 64
+SHEET_LOADED_MAX = 4
+LIST_PAGE = 500  # listbox rows inserted per event-loop turn
+
+
+class FrameCache:
+    """Small LRU of decoded viewer frames, downscaled at decode time to max_size."""
+
+    def __init__(self, max_size, capacity=VIEWER_FRAME_CACHE):
+        self.max_size = max_size
+        self.capacity = capacity
+        self.frames = OrderedDict()
+        self.pending = {}
+        self.lock = threading.Lock()
+
+    def decode(self, path):
+        with Image.open(path) as src:
+            src.draft("RGB", self.max_size)
+            src.load()
+            im = src.copy()
+        if im.width > self.max_size[0] or im.height > self.max_size[1]:
+            im.thumbnail(self.max_size)
+        with self.lock:
+            self.frames[path] = im
+            self.frames.move_to_end(path)
+            while len(self.frames) > self.capacity:
+                self.frames.popitem(last=False)
+        return im
+
+    def get(self, path):
+        with self.lock:
+            im = self.frames.get(path)
+            if im is not None:
+                self.frames.move_to_end(path)
+                return im
+            future = self.pending.pop(path, None)
+        if future is not None and not future.cancel():
+            try:
+                return future.result()
+            except Exception:
+                pass
+        return self.decode(path)
+
+    def prefetch(self, pool, path):
+        with self.lock:
+            if path in self.frames or path in self.pending:
+                return
+            future = pool.submit(self.decode, path)
+            self.pending[path] = future
+        future.add_done_callback(lambda f: self._done(path, f))
+
+    def _done(self, path, future):
+        with self.lock:
+            if self.pending.get(path) is future:
+                del self.pending[path]
+
+    def cancel(self):
+        with self.lock:
+            pending = list(self.pending.values())
+            self.pending.clear()
+        for f in pending:
+            f.cancel()
 
 
 class PassportApp:
@@ -19,23 +100,13 @@ class PassportApp:
         self.accent_color = "#ff6b35"
         self.highlight_color = "#ff8c69"
         self.data_path = os.path.join("Passport", "places.json")
-        self.categories = [
-            "food",
-            "scenery",
-            "safety",
-            "accessibility",
-            "value",
-            "culture",
-            "nightlife",
-            "nature",
-            "history",
-            "comfort",
-            "cleanliness",
-            "transport",
-            "friendliness",
-            "weather",
-        ]
-        self.places = self.load_places()
+        self.categories = list(CATEGORIES)
+        self.core = PassportCore(self.data_path, self.categories)
+        self.load_places()
+        self.filter_ids = None
+        self._search_job = None
+        self._page_job = None
+        self._decode_pool = None
         self.create_widgets()
 
     # ---------- UI skeleton ----------
@@ -81,6 +152,46 @@ class PassportApp:
             padx=8,
             pady=4,
         ).pack(side=tk.LEFT, padx=4)
+        tk.Button(
+            btns,
+            text="Import",
+            command=self.import_places_file,
+            bg="#666666",
+            fg="white",
+            relief=tk.FLAT,
+            padx=8,
+            pady=4,
+        ).pack(side=tk.LEFT, padx=4)
+        tk.Button(
+            btns,
+            text="Rank",
+            command=self.open_rank_window,
+            bg="#666666",
+            fg="white",
+            relief=tk.FLAT,
+            padx=8,
+            pady=4,
+        ).pack(side=tk.LEFT, padx=4)
+        tk.Button(
+            btns,
+            text="Stats",
+            command=self.open_stats_window,
+            bg="#666666",
+            fg="white",
+            relief=tk.FLAT,
+            padx=8,
+            pady=4,
+        ).pack(side=tk.LEFT, padx=4)
+        tk.Button(
+            btns,
+            text="Duplicates",
+            command=self.open_duplicates_window,
+            bg="#666666",
+            fg="white",
+            relief=tk.FLAT,
+            padx=8,
+            pady=4,
+        ).pack(side=tk.LEFT, padx=4)
         tk.Button(
             btns,
             text="Show Gallery",
@@ -112,6 +223,26 @@ class PassportApp:
             pady=4,
         ).pack(side=tk.LEFT, padx=4)
 
+        search_row = tk.Frame(main, bg=self.bg_color)
+        search_row.pack(fill=tk.X, padx=10, pady=(0, 6))
+        tk.Label(
+            search_row,
+            text="Search:",
+            bg=self.bg_color,
+            fg=self.text_fg,
+            font=("Arial", 10, "bold"),
+        ).pack(side=tk.LEFT)
+        self.search_var = tk.StringVar()
+        tk.Entry(
+            search_row,
+            textvariable=self.search_var,
+            bg=self.text_bg,
+            fg=self.text_fg,
+            insertbackground=self.text_fg,
+            font=("Arial", 11),
+        ).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(8, 0))
+        self.search_var.trace_add("write", lambda *a: self._schedule_search())
+
         body = tk.Frame(main, bg=self.bg_color)
         body.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
 
@@ -155,126 +286,198 @@ class PassportApp:
 
     # ---------- data ----------
     def compute_overall(self, scores: dict) -> float:
-        if not scores:
-            return 0.0
-        vals = [max(0, min(100, int(scores.get(c, 0)))) for c in self.categories]
-        return round(sum(vals) / len(vals), 1)
+        return self.core.compute_overall(scores)
 
     def load_places(self):
         try:
-            folder = os.path.dirname(self.data_path)
-            if folder and not os.path.exists(folder):
-                os.makedirs(folder)
-            if os.path.exists(self.data_path):
-                with open(self.data_path, "r", encoding="utf-8") as f:
-                    return json.load(f)
-        except Exception:
-            pass
-        return []
+            self.core.load()
+        except CorruptDataError as e:
+            messagebox.showerror("Error", f"Saved places could not be read:\n{e}")
+        except OSError as e:
+            messagebox.showerror("Error", f"Failed to load places:\n{e}")
 
     def save_places(self):
         try:
-            with open(self.data_path, "w", encoding="utf-8") as f:
-                json.dump(self.places, f, indent=4, ensure_ascii=False)
-        except Exception as e:
+            self.core.save_all()
+        except OSError as e:
             messagebox.showerror("Error", f"Failed to save: {e}")
 
+    def save_changes(self):
+        try:
+            self.core.flush()
+        except OSError as e:
+            messagebox.showerror("Error", f"Failed to save: {e}")
+
+    def _list_label(self, p):
+        name = p.get("name", "(unnamed)")
+        date_str = p.get("date_visited", "")
+        display_date = "No Date"
+        if date_str:
+            try:
+                display_date = datetime.strptime(date_str, "%Y-%m").strftime("%B %Y")
+            except ValueError:
+                display_date = date_str
+        return f"{display_date}  —  {name}"
+
     def refresh_listbox(self):
+        if self._page_job is not None:
+            self.root.after_cancel(self._page_job)
+            self._page_job = None
         self.listbox.delete(0, tk.END)
-        for p in sorted(
-            self.places, key=lambda x: x.get("date_visited", "0000-00"), reverse=True
-        ):
-            name = p.get("name", "(unnamed)")
-            date_str = p.get("date_visited", "")
-            display_date = "No Date"
-            if date_str:
-                try:
-                    display_date = datetime.strptime(date_str, "%Y-%m").strftime("%B %Y")
-                except ValueError:
-                    display_date = date_str
-            display = f"{display_date}  —  {name}"
-            self.listbox.insert(tk.END, display)
+        if self.filter_ids is None:
+            self._insert_pages(self.core.pages(LIST_PAGE))
+        else:
+            rows = (self.core.places.get(pid) for pid in self.filter_ids)
+            self.listbox.insert(tk.END, *[self._list_label(p) for p in rows])
+
+    def _insert_pages(self, pages):
+        """Insert one page of rows now and the rest one per event-loop turn, so a
+        large collection doesn't hold up the window."""
+        self._page_job = None
+        for page in pages:
+            self.listbox.insert(tk.END, *[self._list_label(p) for p in page])
+            self._page_job = self.root.after(1, self._insert_pages, pages)
+            return
+
+    def _selected_place(self):
+        sel = self.listbox.curselection()
+        if not sel:
+            return None
+        if self.filter_ids is not None:
+            return self.core.places.get(self.filter_ids[sel[0]])
+        return self.core.places.at(sel[0])
+
+    def _put_place(self, entry):
+        old_row, row = self.core.put(entry)
+        if self.filter_ids is not None:
+            self._apply_search()
+            return row
+        if self._page_job is not None:
+            # still paging the list in; start again so rows stay in index order
+            self.refresh_listbox()
+            return row
+        if old_row is not None:
+            self.listbox.delete(old_row)
+        self.listbox.insert(row, self._list_label(entry))
+        return row
+
+    def _drop_place(self, pid):
+        row = self.core.remove(pid)
+        if self.filter_ids is not None:
+            self._apply_search()
+        elif self._page_job is not None:
+            self.refresh_listbox()
+        else:
+            self.listbox.delete(row)
+
+    # ---------- search ----------
+    def _schedule_search(self):
+        if self._search_job is not None:
+            self.root.after_cancel(self._search_job)
+        self._search_job = self.root.after(SEARCH_DEBOUNCE_MS, self._apply_search)
+
+    def _apply_search(self):
+        self._search_job = None
+        self.filter_ids = self.core.search(self.search_var.get())
+        self.refresh_listbox()
+        self._update_preview_for_selection()
 
     # ---------- list actions ----------
     def open_add_window(self):
         self.open_edit_window()
 
+    def import_places_file(self):
+        path = filedialog.askopenfilename(
+            title="Import places",
+            filetypes=[
+                ("Places", "*.csv *.geojson *.json"),
+                ("CSV", "*.csv"),
+                ("GeoJSON", "*.geojson"),
+                ("JSON", "*.json"),
+            ],
+        )
+        if not path:
+            return
+        self.root.config(cursor="watch")
+        self.root.update_idletasks()
+        try:
+            report = self.core.import_places(iter_import_file(path, categories=self.categories))
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Import failed", f"Nothing was imported:\n{e}")
+            return
+        finally:
+            self.root.config(cursor="")
+        self._apply_search()
+        lines = [str(report)]
+        lines += [f"record {n}: {msg}" for n, msg in report.errors[:10]]
+        messagebox.showinfo("Import", "\n".join(lines))
+
     def open_edit_selected(self):
-        sel = self.listbox.curselection()
-        if not sel:
+        target = self._selected_place()
+        if target is None:
             messagebox.showwarning("No selection", "Select a place to edit.")
             return
-        idx = sel[0]
-        target = sorted(
-            self.places, key=lambda x: x.get("date_visited", "0000-00"), reverse=True
-        )[idx]
         self.open_edit_window(target)
 
     def delete_selected(self):
-        sel = self.listbox.curselection()
-        if not sel:
+        target = self._selected_place()
+        if target is None:
             messagebox.showwarning("No selection", "Select a place to delete.")
             return
-        idx = sel[0]
-        sorted_places = sorted(
-            self.places, key=lambda x: x.get("date_visited", "0000-00"), reverse=True
-        )
-        target = sorted_places[idx]
         if not messagebox.askyesno("Delete", f"Delete '{target.get('name')}'?"):
             return
-        for i, p in enumerate(self.places):
-            if p.get("id") == target.get("id"):
-                del self.places[i]
-                break
-        self.save_places()
-        self.refresh_listbox()
+        self._drop_place(target["id"])
+        self.save_changes()
         self.preview.config(state=tk.NORMAL)
         self.preview.delete(1.0, tk.END)
         self.preview.config(state=tk.DISABLED)
 
     # ---------- gallery ----------
     def open_gallery_selected(self):
-        sel = self.listbox.curselection()
-        if not sel:
+        place = self._selected_place()
+        if place is None:
             messagebox.showwarning("No Selection", "Select a place to view its gallery.")
             return
-        idx = sel[0]
-        place = sorted(self.places, key=lambda x: x.get("date_visited", "0000-00"), reverse=True)[idx]
         photo_dir = place.get("photo_dir")
         if not photo_dir or not os.path.isdir(photo_dir):
             messagebox.showerror("Error", f"The photo directory is invalid or not set.\nPath: {photo_dir}")
             return
         self.show_gallery_window(place, photo_dir)
 
-    def _list_images(self, dir_path):
+    def _list_images(self, dir_path, recursive=True):
         try:
-            files = sorted(os.listdir(dir_path))
+            return self.core.list_images(dir_path, recursive)
         except Exception as e:
             messagebox.showerror("Error", f"Cannot read folder:\n{e}")
             return []
-        out = []
-        for f in files:
-            p = os.path.join(dir_path, f)
-            if os.path.isfile(p) and os.path.splitext(f.lower())[1] in IMAGE_EXTS:
-                out.append(p)
-        return out
 
-    def _make_scrollable(self, parent):
+    def _get_decode_pool(self):
+        if self._decode_pool is None:
+            self._decode_pool = ThreadPoolExecutor(
+                max_workers=os.cpu_count() or 4, thread_name_prefix="thumbs"
+            )
+        return self._decode_pool
+
+    def _make_scroll_canvas(self, parent):
         canvas = tk.Canvas(parent, highlightthickness=0, bg=self.bg_color)
         vscroll = ttk.Scrollbar(parent, orient="vertical", command=canvas.yview)
+        canvas.configure(yscrollcommand=vscroll.set)
+        canvas.grid(row=0, column=0, sticky="nsew")
+        vscroll.grid(row=0, column=1, sticky="ns")
+        parent.grid_rowconfigure(0, weight=1)
+        parent.grid_columnconfigure(0, weight=1)
+        return canvas, vscroll
+
+    def _make_scrollable(self, parent):
+        canvas, _ = self._make_scroll_canvas(parent)
         frame = ttk.Frame(canvas)
         frame_id = canvas.create_window((0, 0), window=frame, anchor="nw")
-        canvas.configure(yscrollcommand=vscroll.set)
 
         def on_cfg(event):
             canvas.itemconfig(frame_id, width=event.width)
             canvas.configure(scrollregion=canvas.bbox("all"))
 
         frame.bind("<Configure>", on_cfg)
-        canvas.grid(row=0, column=0, sticky="nsew")
-        vscroll.grid(row=0, column=1, sticky="ns")
-        parent.grid_rowconfigure(0, weight=1)
-        parent.grid_columnconfigure(0, weight=1)
         return frame
 
     def _show_image_viewer(self, parent, paths, start_idx=0):
@@ -289,24 +492,58 @@ class PassportApp:
         caption = ttk.Label(win, anchor="center")
         caption.pack(side="bottom", fill="x")
 
-        cache = {"img": None}
+        cache = {"img": None, "rendered": None, "resize_job": None}
+        frames = FrameCache((win.winfo_screenwidth(), win.winfo_screenheight()))
 
-        def show(i):
-            if not paths:
-                return
-            i %= len(paths)
-            idx["i"] = i
+        def target_size():
+            w = win.winfo_width() or 900
+            h = win.winfo_height() or 700
+            return (max(1, w - 40), max(1, h - 120))
+
+        def render(i, size):
+            if cache["rendered"] == (i, size):
+                return True
             p = paths[i]
             try:
-                im = Image.open(p)
-                w = win.winfo_width() or 900
-                h = win.winfo_height() or 700
-                im.thumbnail((w - 40, h - 120))
+                im = frames.get(p).copy()
+                im.thumbnail(size)
                 cache["img"] = ImageTk.PhotoImage(im)
                 img_label.configure(image=cache["img"])
                 caption.configure(text=f"{os.path.basename(p)}   [{i+1}/{len(paths)}]")
             except Exception as e:
                 messagebox.showerror("Error", f"Cannot open image:\n{p}\n{e}")
+                return False
+            cache["rendered"] = (i, size)
+            return True
+
+        def show(i):
+            if not paths:
+                return
+            i %= len(paths)
+            idx["i"] = i
+            if not render(i, target_size()):
+                return
+            pool = self._get_decode_pool()
+            for step in VIEWER_PREFETCH:
+                frames.prefetch(pool, paths[(i + step) % len(paths)])
+
+        def on_resize_settled():
+            cache["resize_job"] = None
+            if paths:
+                render(idx["i"], target_size())
+
+        def on_configure(event):
+            if event.widget is not win:
+                return
+            if cache["resize_job"] is not None:
+                win.after_cancel(cache["resize_job"])
+            cache["resize_job"] = win.after(VIEWER_RESIZE_DEBOUNCE_MS, on_resize_settled)
+
+        def on_close():
+            if cache["resize_job"] is not None:
+                win.after_cancel(cache["resize_job"])
+            frames.cancel()
+            win.destroy()
 
         def prev_():
             show(idx["i"] - 1)
@@ -320,14 +557,14 @@ class PassportApp:
         ttk.Button(nav, text="Next", command=next_).pack(side="left", padx=4)
         win.bind("<Left>", lambda e: prev_())
         win.bind("<Right>", lambda e: next_())
-        win.bind("<Configure>", lambda e: show(idx["i"]))
+        win.bind("<Configure>", on_configure)
+        win.protocol("WM_DELETE_WINDOW", on_close)
         show(start_idx)
 
-    def show_gallery_window(self, place, directory, thumb_size=(200, 200), columns=4):
-        paths = self._list_images(directory)
-        if not paths:
-            messagebox.showinfo("Gallery", "No images found.")
-            return
+    def show_gallery_window(
+        self, place, directory, thumb_size=(200, 200), columns=4, paths=None
+    ):
+        given, paths = paths, []
 
         gallery_win = tk.Toplevel(self.root)
         gallery_win.title(f"Gallery — {place.get('name','')}")
@@ -336,39 +573,485 @@ class PassportApp:
 
         container = ttk.Frame(gallery_win)
         container.pack(fill="both", expand=True)
-        grid_frame = self._make_scrollable(container)
+        canvas, vscroll = self._make_scroll_canvas(container)
 
-        thumbs = []
+        # Only the rows in view (plus overscan) get widgets; cells are recycled
+        # as the canvas scrolls and PhotoImages live in a bounded LRU.
+        placeholder = tk.PhotoImage(width=thumb_size[0], height=thumb_size[1])
+        photos = OrderedDict()
+        cells = []
+        inflight = {}
+        failed = {}  # path -> mtime it failed to decode at; not retried until it changes
+        results = queue.Queue()
+        found = queue.Queue()
+        scan_order = {}
+        state = {
+            "closed": False,
+            "render_queued": False,
+            "polling": False,
+            "scanning": True,
+            "sorting": False,
+        }
+        by_time = tk.BooleanVar(value=False)
 
-        def open_view(i):
-            self._show_image_viewer(gallery_win, paths, i)
+        def open_view(cell):
+            if cell["index"] is not None:
+                self._show_image_viewer(gallery_win, paths, cell["index"])
 
-        for i, p in enumerate(paths):
-            try:
-                im = Image.open(p)
-                im.thumbnail(thumb_size)
-                tkimg = ImageTk.PhotoImage(im)
-            except Exception:
-                continue
-            thumbs.append(tkimg)
-            cell = ttk.Frame(grid_frame, padding=6, borderwidth=1, relief="solid")
-            r, c = divmod(i, columns)
-            cell.grid(row=r, column=c, padx=6, pady=6, sticky="nsew")
-            lbl = ttk.Label(cell, image=tkimg)
+        def new_cell():
+            frame = ttk.Frame(canvas, padding=6, borderwidth=1, relief="solid")
+            lbl = ttk.Label(frame, image=placeholder, compound="center")
             lbl.pack()
-            cap = ttk.Label(cell, text=os.path.basename(p), width=30)
+            cap = ttk.Label(frame, width=30)
             cap.pack()
-            lbl.bind("<Button-1>", lambda e, i=i: open_view(i))
-            cap.bind("<Button-1>", lambda e, i=i: open_view(i))
+            cell = {"frame": frame, "img": lbl, "cap": cap, "index": None}
+            cell["item"] = canvas.create_window(0, 0, window=frame, anchor="nw")
+            lbl.bind("<Button-1>", lambda e: open_view(cell))
+            cap.bind("<Button-1>", lambda e: open_view(cell))
+            cells.append(cell)
+            return cell
+
+        probe = new_cell()
+        probe["cap"].configure(text="M")
+        canvas.update_idletasks()
+        cell_w = probe["frame"].winfo_reqwidth() + 12
+        cell_h = probe["frame"].winfo_reqheight() + 12
+        grid = {"rows": 0}
+
+        def set_rows():
+            grid["rows"] = (len(paths) + columns - 1) // columns
+            canvas.configure(scrollregion=(0, 0, columns * cell_w, grid["rows"] * cell_h))
+
+        def remember(p, photo):
+            photos[p] = photo
+            photos.move_to_end(p)
+            while len(photos) > GALLERY_PHOTO_POOL:
+                photos.popitem(last=False)
+
+        def show_in(cell, i):
+            cell["index"] = i
+            r, c = divmod(i, columns)
+            canvas.coords(cell["item"], c * cell_w + 6, r * cell_h + 6)
+            canvas.itemconfigure(cell["item"], state="normal")
+            p = paths[i]
+            cell["cap"].configure(text=os.path.relpath(p, directory))
+            photo = photos.get(p)
+            if photo is not None:
+                photos.move_to_end(p)
+                cell["img"].configure(image=photo, text="")
+            elif p in failed and failed[p] == mtime_of(p):
+                cell["img"].configure(image=placeholder, text="(unreadable)")
+            else:
+                cell["img"].configure(image=placeholder, text="Loading…")
+                request(p)
+
+        def mtime_of(p):
+            try:
+                return os.stat(p).st_mtime_ns
+            except OSError:
+                return None
+
+        def decode(p):
+            try:
+                results.put((p, self.core.thumb_cache.get_or_create(p, thumb_size), None))
+            except Exception:
+                results.put((p, None, mtime_of(p)))
+
+        def request(p):
+            if p in inflight or state["closed"]:
+                return
+            inflight[p] = self._get_decode_pool().submit(decode, p)
+            ensure_polling()
+
+        def render():
+            state["render_queued"] = False
+            if state["closed"]:
+                return
+            top = canvas.canvasy(0)
+            height = canvas.winfo_height()
+            first = max(0, int(top // cell_h) - GALLERY_OVERSCAN_ROWS)
+            last = min(grid["rows"] - 1, int((top + height) // cell_h) + GALLERY_OVERSCAN_ROWS)
+            wanted = range(first * columns, min(len(paths), (last + 1) * columns))
+            shown = {c["index"] for c in cells if c["index"] in wanted}
+            free = [c for c in cells if c["index"] not in shown]
+            for i in wanted:
+                if i not in shown:
+                    show_in(free.pop() if free else new_cell(), i)
+            for c in free:
+                c["index"] = None
+                canvas.itemconfigure(c["item"], state="hidden")
+            visible = {paths[i] for i in wanted}
+            for p in [p for p in inflight if p not in visible]:
+                if inflight[p].cancel():
+                    del inflight[p]
+
+        def schedule_render(*_):
+            if not state["render_queued"]:
+                state["render_queued"] = True
+                gallery_win.after_idle(render)
+
+        def on_yscroll(lo, hi):
+            vscroll.set(lo, hi)
+            schedule_render()
+
+        def scan():
+            batch = []
+            try:
+                for p in self.core.photo_index.scan(directory):
+                    if state["closed"]:
+                        return
+                    batch.append(p)
+                    if len(batch) >= SCAN_BATCH:
+                        found.put(batch)
+                        batch = []
+                found.put(batch)
+                found.put(None)
+            except Exception as e:
+                found.put(e)
+
+        def take_found():
+            grew = False
+            done = None
+            while done is None:
+                try:
+                    item = found.get_nowait()
+                except queue.Empty:
+                    break
+                if isinstance(item, list):
+                    for p in item:
+                        scan_order[p] = len(scan_order)
+                    paths.extend(item)
+                    grew = grew or bool(item)
+                    continue
+                if isinstance(item, dict):
+                    apply_order(item)
+                    continue
+                state["scanning"] = False
+                done = item or True
+            if grew:
+                set_rows()
+                schedule_render()
+            if done is True and by_time.get():
+                resort()
+            if isinstance(done, Exception):
+                count_lbl.configure(text=f"Cannot read folder: {done}")
+            elif done and not paths:
+                count_lbl.configure(text="No images found.")
+            else:
+                suffix = "  (scanning…)" if state["scanning"] else ""
+                count_lbl.configure(text=f"{len(paths)} images{suffix}")
+
+        def apply_order(exif):
+            state["sorting"] = False
+            if by_time.get():
+                paths.sort(key=lambda p: ((exif.get(p) or (None,))[0] or "~", scan_order[p]))
+            else:
+                paths.sort(key=scan_order.__getitem__)
+            for c in cells:
+                c["index"] = None
+            schedule_render()
+
+        def read_times(snapshot):
+            try:
+                exif = self.core.exif_index.lookup(snapshot)
+                self.core.exif_index.flush()
+            except Exception:
+                exif = {}
+            found.put(exif)
+
+        def resort():
+            if state["scanning"]:
+                return  # take_found() re-sorts once the scan completes
+            if not by_time.get():
+                apply_order({})
+                return
+            state["sorting"] = True
+            threading.Thread(target=read_times, args=(list(paths),), daemon=True).start()
+            ensure_polling()
+
+        def ensure_polling():
+            if not state["polling"]:
+                state["polling"] = True
+                gallery_win.after(GALLERY_POLL_MS, poll)
+
+        def poll():
+            if state["closed"]:
+                return
+            if state["scanning"] or state["sorting"]:
+                take_found()
+            for _ in range(GALLERY_FILLS_PER_TICK):
+                try:
+                    p, im, mtime = results.get_nowait()
+                except queue.Empty:
+                    break
+                inflight.pop(p, None)
+                if im is None:
+                    photo = None
+                    failed[p] = mtime
+                else:
+                    photo = ImageTk.PhotoImage(im)
+                    remember(p, photo)
+                for c in cells:
+                    if c["index"] is not None and paths[c["index"]] == p:
+                        if photo is None:
+                            c["img"].configure(text="(unreadable)")
+                        else:
+                            c["img"].configure(image=photo, text="")
+            if state["scanning"] or state["sorting"] or inflight or not results.empty():
+                gallery_win.after(GALLERY_POLL_MS, poll)
+            else:
+                state["polling"] = False
+                self.core.thumb_cache.flush()
+
+        def on_close():
+            state["closed"] = True
+            for f in inflight.values():
+                f.cancel()
+            self.core.thumb_cache.flush()
+            gallery_win.destroy()
 
         footer = ttk.Frame(gallery_win)
         footer.pack(fill="x")
-        ttk.Label(footer, text=f"{len(paths)} images").pack(side="left", padx=8)
+        count_lbl = ttk.Label(footer, text="Scanning…")
+        count_lbl.pack(side="left", padx=8)
+        ttk.Checkbutton(
+            footer, text="Sort by capture time", variable=by_time, command=resort
+        ).pack(side="left", padx=8)
         ttk.Button(
             footer,
             text="Open Folder",
             command=lambda: self._open_folder(directory),
         ).pack(side="right", padx=8)
+        ttk.Button(
+            footer,
+            text="Contact Sheet",
+            command=lambda: self.show_contact_sheet_window(place, directory, list(paths)),
+        ).pack(side="right", padx=8)
+
+        canvas.configure(yscrollcommand=on_yscroll)
+        canvas.bind("<Configure>", schedule_render)
+        gallery_win.protocol("WM_DELETE_WINDOW", on_close)
+        set_rows()
+        schedule_render()
+        if given is None:
+            threading.Thread(target=scan, daemon=True).start()
+        else:
+            found.put(list(given))
+            found.put(None)
+        state["polling"] = True
+        gallery_win.after(GALLERY_POLL_MS, poll)
+
+    def show_contact_sheet_window(
+        self, place, directory, paths=None, thumb_size=(160, 160), columns=6
+    ):
+        if paths is None:
+            paths = self._list_images(directory)
+        if not paths:
+            messagebox.showinfo("Contact Sheet", "No images found.")
+            return
+        win = tk.Toplevel(self.root)
+        win.title(f"Contact Sheet — {place.get('name','')}")
+        win.geometry("1000x700")
+        win.configure(bg=self.bg_color)
+
+        container = ttk.Frame(win)
+        container.pack(fill="both", expand=True)
+        canvas, vscroll = self._make_scroll_canvas(container)
+        status = ttk.Label(win, text=f"{len(paths)} images — building sheets…")
+        status.pack(side="bottom", fill="x", padx=8)
+
+        cw, ch = thumb_size
+        sheet_h = SHEET_ROWS * ch
+        rows = (len(paths) + columns - 1) // columns
+        canvas.configure(scrollregion=(0, 0, columns * cw, rows * ch))
+        sheets = self.core.sheet_cache.plan(paths, columns)
+        sheet_paths = {}  # sheet index -> cache file, once built
+        ready = set()
+        broken = set()
+        loading = set()
+        loaded = OrderedDict()  # sheet index -> (canvas item, PhotoImage)
+        out = queue.Queue()
+        state = {"closed": False, "render_queued": False, "polling": False}
+
+        def build():
+            for n, chunk in enumerate(sheets):
+                if state["closed"]:
+                    return
+                try:
+                    path = self.core.sheet_cache.ensure(directory, chunk, thumb_size, columns)
+                    out.put(("ready", n, path))
+                except Exception as e:
+                    out.put(("failed", n, e))
+            self.core.thumb_cache.flush()
+            self.core.sheet_cache.evict()
+
+        def load(n, path):
+            try:
+                im = Image.open(path)
+                im.load()
+                out.put(("image", n, im))
+            except Exception as e:
+                out.put(("failed", n, e))
+
+        def render():
+            state["render_queued"] = False
+            top = canvas.canvasy(0)
+            bottom = top + canvas.winfo_height()
+            first = max(0, int(top // sheet_h) - 1)
+            last = min(len(sheets) - 1, int(bottom // sheet_h) + 1)
+            for n in range(first, last + 1):
+                if n in loaded:
+                    loaded.move_to_end(n)
+                elif n in ready and n not in loading and n not in broken:
+                    loading.add(n)
+                    self._get_decode_pool().submit(load, n, sheet_paths[n])
+                    ensure_polling()
+            while len(loaded) > max(SHEET_LOADED_MAX, last - first + 1):
+                n, (item, _) = loaded.popitem(last=False)
+                canvas.delete(item)
+
+        def schedule_render(*_):
+            if not state["render_queued"]:
+                state["render_queued"] = True
+                win.after_idle(render)
+
+        def on_yscroll(lo, hi):
+            vscroll.set(lo, hi)
+            schedule_render()
+
+        def ensure_polling():
+            if not state["polling"]:
+                state["polling"] = True
+                win.after(GALLERY_POLL_MS, poll)
+
+        def poll():
+            if state["closed"]:
+                return
+            while True:
+                try:
+                    kind, n, payload = out.get_nowait()
+                except queue.Empty:
+                    break
+                if kind == "ready":
+                    sheet_paths[n] = payload
+                    ready.add(n)
+                    if len(ready) == len(sheets):
+                        status.configure(text=f"{len(paths)} images")
+                    schedule_render()
+                elif kind == "image":
+                    loading.discard(n)
+                    photo = ImageTk.PhotoImage(payload)
+                    item = canvas.create_image(0, n * sheet_h, image=photo, anchor="nw")
+                    loaded[n] = (item, photo)
+                    schedule_render()
+                else:
+                    loading.discard(n)
+                    broken.add(n)
+                    status.configure(text=f"Sheet {n + 1} failed: {payload}")
+            if len(ready | broken) < len(sheets) or loading or not out.empty():
+                win.after(GALLERY_POLL_MS, poll)
+            else:
+                state["polling"] = False
+
+        def hit(event):
+            x, y = canvas.canvasx(event.x), canvas.canvasy(event.y)
+            c, r = int(x // cw), int(y // ch)
+            if 0 <= c < columns and r >= 0:
+                i = r * columns + c
+                if i < len(paths):
+                    return i
+            return None
+
+        def on_click(event):
+            i = hit(event)
+            if i is not None:
+                self._show_image_viewer(win, paths, i)
+
+        def on_motion(event):
+            i = hit(event)
+            if i is not None:
+                status.configure(text=f"{os.path.relpath(paths[i], directory)}   [{i + 1}/{len(paths)}]")
+
+        def on_close():
+            state["closed"] = True
+            win.destroy()
+
+        canvas.configure(yscrollcommand=on_yscroll)
+        canvas.bind("<Configure>", schedule_render)
+        canvas.bind("<Button-1>", on_click)
+        canvas.bind("<Motion>", on_motion)
+        win.protocol("WM_DELETE_WINDOW", on_close)
+        threading.Thread(target=build, daemon=True).start()
+        ensure_polling()
+
+    def open_duplicates_window(self):
+        w = tk.Toplevel(self.root)
+        w.title("Duplicate Photos")
+        w.geometry("700x500")
+        w.configure(bg=self.bg_color)
+        status = tk.Label(
+            w,
+            text="Hashing photos…",
+            bg=self.bg_color,
+            fg=self.text_fg,
+            font=("Arial", 10, "bold"),
+        )
+        status.pack(anchor="w", padx=12, pady=(12, 6))
+        clusters_list = tk.Listbox(
+            w,
+            bg=self.text_bg,
+            fg=self.text_fg,
+            selectbackground=self.accent_color,
+            selectforeground="white",
+            font=("Arial", 11),
+        )
+        clusters_list.pack(fill=tk.BOTH, expand=True, padx=12, pady=(0, 12))
+        clusters = []
+        out = queue.Queue()
+        dirs = self.core.photo_dir_snapshot()
+
+        def work():
+            try:
+                out.put(self.core.find_duplicates(dirs=dirs))
+            except Exception as e:
+                out.put(e)
+
+        def poll():
+            if not w.winfo_exists():
+                return
+            try:
+                result = out.get_nowait()
+            except queue.Empty:
+                w.after(100, poll)
+                return
+            if isinstance(result, Exception):
+                status.configure(text=f"Failed: {result}")
+                return
+            clusters[:] = result
+            extra = sum(len(c) - 1 for c in clusters)
+            status.configure(
+                text=f"{len(clusters)} duplicate groups, {extra} redundant photos"
+                " — double-click a group to view it"
+            )
+            for c in clusters:
+                clusters_list.insert(tk.END, f"{len(c)} photos  —  {c[0]}")
+
+        def open_cluster(e):
+            sel = clusters_list.curselection()
+            if not sel:
+                return
+            cluster = clusters[sel[0]]
+            try:
+                root = os.path.commonpath(cluster)
+            except ValueError:  # photos on different drives
+                root = os.path.dirname(cluster[0])
+            self.show_gallery_window(
+                {"name": f"Duplicates ({len(cluster)})"}, root, paths=cluster
+            )
+
+        clusters_list.bind("<Double-Button-1>", open_cluster)
+        threading.Thread(target=work, daemon=True).start()
+        w.after(100, poll)
 
     def _open_folder(self, path):
         try:
@@ -383,15 +1066,248 @@ class PassportApp:
         except Exception as e:
             messagebox.showerror("Error", f"Could not open folder:\n{e}")
 
+    # ---------- ranking ----------
+    def rank_places(self, weights=None, k=20, country=None, after=None, before=None):
+        return self.core.rank(weights, k, country, after, before)
+
+    def open_rank_window(self):
+        w = tk.Toplevel(self.root)
+        w.title("Rank Places")
+        w.geometry("760x640")
+        w.configure(bg=self.bg_color)
+
+        tk.Label(
+            w,
+            text="Category Weights (0 = ignore):",
+            bg=self.bg_color,
+            fg=self.text_fg,
+            font=("Arial", 10, "bold"),
+        ).pack(anchor="w", padx=12, pady=(12, 6))
+        weights_frame = tk.Frame(w, bg=self.bg_color)
+        weights_frame.pack(fill=tk.X, padx=12)
+        weight_vars = {}
+        half = (len(self.categories) + 1) // 2
+        for i, c in enumerate(self.categories):
+            r, col = i % half, (i // half) * 2
+            tk.Label(
+                weights_frame,
+                text=c.title() + ":",
+                width=14,
+                anchor="w",
+                bg=self.bg_color,
+                fg=self.text_fg,
+                font=("Arial", 10),
+            ).grid(row=r, column=col, sticky="w", pady=2)
+            iv = tk.IntVar(value=0)
+            tk.Spinbox(
+                weights_frame,
+                from_=0,
+                to=10,
+                textvariable=iv,
+                width=4,
+                bg=self.text_bg,
+                fg=self.text_fg,
+                relief=tk.FLAT,
+            ).grid(row=r, column=col + 1, sticky="w", padx=(4, 24), pady=2)
+            weight_vars[c] = iv
+
+        filters = tk.Frame(w, bg=self.bg_color)
+        filters.pack(fill=tk.X, padx=12, pady=(10, 0))
+        filter_ents = {}
+        for label, key, width in (
+            ("Country:", "country", 16),
+            ("After:", "after", 8),
+            ("Before:", "before", 8),
+        ):
+            tk.Label(
+                filters, text=label, bg=self.bg_color, fg=self.text_fg, font=("Arial", 10)
+            ).pack(side=tk.LEFT)
+            ent = tk.Entry(filters, width=width, bg=self.text_bg, fg=self.text_fg)
+            ent.pack(side=tk.LEFT, padx=(4, 12))
+            filter_ents[key] = ent
+        tk.Label(
+            filters, text="Top:", bg=self.bg_color, fg=self.text_fg, font=("Arial", 10)
+        ).pack(side=tk.LEFT)
+        k_var = tk.IntVar(value=20)
+        tk.Spinbox(
+            filters,
+            from_=1,
+            to=1000,
+            textvariable=k_var,
+            width=5,
+            bg=self.text_bg,
+            fg=self.text_fg,
+            relief=tk.FLAT,
+        ).pack(side=tk.LEFT, padx=(4, 0))
+
+        results = tk.Listbox(
+            w,
+            bg=self.text_bg,
+            fg=self.text_fg,
+            selectbackground=self.accent_color,
+            selectforeground="white",
+            font=("Arial", 11),
+        )
+        results.pack(fill=tk.BOTH, expand=True, padx=12, pady=(10, 0))
+        hits = []
+
+        def run():
+            try:
+                weights = {c: int(v.get()) for c, v in weight_vars.items()}
+                k = max(1, int(k_var.get()))
+            except (tk.TclError, ValueError):
+                messagebox.showwarning("Invalid", "Weights and Top must be whole numbers.", parent=w)
+                return
+            hits[:] = self.rank_places(
+                {c: v for c, v in weights.items() if v} or None,
+                k,
+                filter_ents["country"].get().strip() or None,
+                filter_ents["after"].get().strip() or None,
+                filter_ents["before"].get().strip() or None,
+            )
+            results.delete(0, tk.END)
+            for score, p in hits:
+                country = p.get("country", "")
+                where = f"  ({country})" if country else ""
+                results.insert(tk.END, f"{score:5.1f}  —  {p.get('name')}{where}")
+
+        def open_hit(e):
+            sel = results.curselection()
+            if sel:
+                self.show_details_window(hits[sel[0]][1])
+
+        results.bind("<Double-Button-1>", open_hit)
+        tk.Button(
+            w,
+            text="Rank",
+            command=run,
+            bg=self.accent_color,
+            fg="white",
+            relief=tk.FLAT,
+            padx=10,
+            pady=6,
+        ).pack(side=tk.RIGHT, padx=12, pady=12)
+        tk.Button(
+            w,
+            text="Close",
+            command=w.destroy,
+            bg="#666666",
+            fg="white",
+            relief=tk.FLAT,
+            padx=10,
+            pady=6,
+        ).pack(side=tk.RIGHT, pady=12)
+        run()
+
+    # ---------- stats ----------
+    def open_stats_window(self):
+        st = self.core.stats
+        w = tk.Toplevel(self.root)
+        w.title("Travel Stats")
+        w.geometry("820x600")
+        w.configure(bg=self.bg_color)
+        tabs = ttk.Notebook(w)
+        tabs.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+        def text_tab(title, lines):
+            frame = ttk.Frame(tabs)
+            tabs.add(frame, text=title)
+            txt = tk.Text(
+                frame, bg=self.text_bg, fg=self.text_fg, wrap=tk.NONE, font=("Courier", 10)
+            )
+            txt.pack(fill=tk.BOTH, expand=True)
+            txt.insert(tk.END, "\n".join(lines))
+            txt.config(state=tk.DISABLED)
+
+        best, worst = st.best_worst()
+        lines = [f"Places visited: {st.count}", ""]
+        if st.count:
+            lines.append(f"Best category overall:  {best.title()}")
+            lines.append(f"Worst category overall: {worst.title()}")
+            lines.append("")
+            for c, avg in sorted(st.category_averages().items(), key=lambda kv: -kv[1]):
+                lines.append(f"  {c.title():18}: {avg:5.1f}")
+        text_tab("Summary", lines)
+
+        lines = []
+        for country, (n, total, _) in sorted(st.countries.items(), key=lambda kv: -kv[1][0]):
+            best, worst = st.best_worst(country)
+            lines.append(
+                f"{st.country_names[country]}  —  {n} visit{'s' if n != 1 else ''}, "
+                f"overall {total / n:.1f}"
+                f"  (best: {best.title()}, worst: {worst.title()})"
+            )
+            avgs = st.category_averages(country)
+            for i in range(0, len(self.categories), 4):
+                row = self.categories[i : i + 4]
+                lines.append("    " + "  ".join(f"{c.title()[:12]:12} {avgs[c]:5.1f}" for c in row))
+            lines.append("")
+        text_tab("By Country", lines)
+
+        per_year = st.per_year()
+        lines = [f"{'Year':6}{'Visits':>8}{'Avg overall':>14}"]
+        lines += [f"{y:<6}{n:>8}{avg:>14.1f}" for y, n, avg in per_year]
+        text_tab("By Year", lines)
+
+        frame = ttk.Frame(tabs)
+        tabs.add(frame, text="Trend")
+        chart = tk.Canvas(frame, bg=self.text_bg, highlightthickness=0)
+        chart.pack(fill=tk.BOTH, expand=True)
+
+        def draw(event=None):
+            chart.delete("all")
+            width, height = chart.winfo_width(), chart.winfo_height()
+            if len(per_year) < 1 or width < 100:
+                chart.create_text(
+                    width // 2, height // 2, text="Not enough dated visits", fill=self.text_fg
+                )
+                return
+            pad = 40
+            y0, y1 = per_year[0][0], per_year[-1][0] + 1
+            span = max(1, y1 - y0)
+
+            def pt(x, v):
+                return (
+                    pad + (x - y0) / span * (width - 2 * pad),
+                    height - pad - v / 100 * (height - 2 * pad),
+                )
+
+            chart.create_line(pad, height - pad, width - pad, height - pad, fill="#888888")
+            chart.create_line(pad, pad, pad, height - pad, fill="#888888")
+            for v in (0, 50, 100):
+                x, y = pt(y0, v)
+                chart.create_text(x - 6, y, text=str(v), anchor="e", fill=self.text_fg)
+            points = [pt(y + 0.5, avg) for y, _, avg in per_year]
+            for (y, _, _), (x, _) in zip(per_year, points):
+                chart.create_text(x, height - pad + 12, text=str(y), fill=self.text_fg)
+            if len(points) > 1:
+                chart.create_line(*[c for p in points for c in p], fill=self.accent_color, width=2)
+            for x, y in points:
+                chart.create_oval(x - 3, y - 3, x + 3, y + 3, fill=self.accent_color, outline="")
+            line = st.trend_line()
+            if line is not None:
+                slope, intercept = line
+                chart.create_line(
+                    *pt(y0, slope * y0 + intercept),
+                    *pt(y1, slope * y1 + intercept),
+                    fill=self.highlight_color,
+                    dash=(4, 3),
+                )
+                chart.create_text(
+                    width - pad,
+                    pad,
+                    anchor="ne",
+                    text=f"trend {slope:+.2f} / year",
+                    fill=self.text_fg,
+                )
+
+        chart.bind("<Configure>", draw)
+
     # ---------- details ----------
     def open_details_selected(self):
-        sel = self.listbox.curselection()
-        if not sel:
+        target = self._selected_place()
+        if target is None:
             return
-        idx = sel[0]
-        target = sorted(
-            self.places, key=lambda x: x.get("date_visited", "0000-00"), reverse=True
-        )[idx]
         self.show_details_window(target)
 
     def show_details_window(self, place):
@@ -407,6 +1323,11 @@ class PassportApp:
             fg=self.text_fg,
         )
         header.pack(anchor="w", padx=12, pady=(12, 6))
+        photos_lbl = tk.Label(
+            w, text="", bg=self.bg_color, fg=self.text_fg, font=("Arial", 10)
+        )
+        photos_lbl.pack(anchor="w", padx=12)
+        self._fill_photo_range(w, photos_lbl, place.get("photo_dir"))
         frame = tk.Frame(w, bg=self.bg_color)
         frame.pack(fill=tk.BOTH, expand=True, padx=12, pady=6)
         left = tk.Frame(frame, bg=self.bg_color)
@@ -465,6 +1386,36 @@ class PassportApp:
             pady=4,
         ).pack(side=tk.RIGHT)
 
+    def _fill_photo_range(self, win, label, photo_dir):
+        if not photo_dir or not os.path.isdir(photo_dir):
+            return
+        label.configure(text="Photos: reading capture dates…")
+        out = queue.Queue()
+
+        def work():
+            try:
+                exif = self.core.exif_index.lookup(list(self.core.photo_index.scan(photo_dir)))
+                self.core.exif_index.flush()
+            except Exception:
+                out.put("Photos: could not read folder")
+                return
+            taken = sorted(info[0] for info in exif.values() if info[0])
+            if not taken:
+                out.put(f"Photos: {len(exif)} (no capture dates)")
+            else:
+                out.put(f"Photos: {len(exif)}, taken {taken[0][:10]} – {taken[-1][:10]}")
+
+        def poll():
+            if not win.winfo_exists():
+                return
+            try:
+                label.configure(text=out.get_nowait())
+            except queue.Empty:
+                win.after(100, poll)
+
+        threading.Thread(target=work, daemon=True).start()
+        win.after(100, poll)
+
     # ---------- editor ----------
     def open_edit_window(self, place=None):
         is_edit = place is not None
@@ -623,15 +1574,8 @@ class PassportApp:
                 "notes": notes_txt.get(1.0, tk.END).strip(),
                 "modified": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             }
-            if is_edit:
-                for i, p in enumerate(self.places):
-                    if p.get("id") == place.get("id"):
-                        self.places[i] = entry
-                        break
-            else:
-                self.places.append(entry)
-            self.save_places()
-            self.refresh_listbox()
+            self._put_place(entry)
+            self.save_changes()
             w.destroy()
 
         tk.Button(
@@ -657,16 +1601,12 @@ class PassportApp:
 
     # ---------- preview ----------
     def _update_preview_for_selection(self):
-        sel = self.listbox.curselection()
-        if not sel:
+        p = self._selected_place()
+        if p is None:
             self.preview.config(state=tk.NORMAL)
             self.preview.delete(1.0, tk.END)
             self.preview.config(state=tk.DISABLED)
             return
-        idx = sel[0]
-        p = sorted(
-            self.places, key=lambda x: x.get("date_visited", "0000-00"), reverse=True
-        )[idx]
         date_str = p.get("date_visited", "N/A")
         display_date = date_str
         if date_str != "N/A":
@@ -698,6 +1638,7 @@ def main():
     root = tk.Tk()
     app = PassportApp(root)
     root.mainloop()
+    app.core.close()
 
 
 if __name__ == "__main__":
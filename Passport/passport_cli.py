@@ -0,0 +1,165 @@
+"""Command-line access to the Passport places store, without the Tk UI.
+
+    python Passport/passport_cli.py list --by overall --limit 10
+    python Passport/passport_cli.py query --weight food=2 --weight nature=1 --country Japan --after 2019
+    python Passport/passport_cli.py export -o places_backup.json
+    python Passport/passport_cli.py import travel_log.csv --dry-run
+    python Passport/passport_cli.py thumbs --build
+    python Passport/passport_cli.py migrate
+"""
+import argparse
+import json
+import sys
+import time
+
+from passport_core import DATA_PATH, PassportCore, iter_import_file
+
+
+def _line(place, score=None):
+    score = place.get("overall", 0) if score is None else score
+    country = place.get("country", "")
+    where = f"  ({country})" if country else ""
+    return f"{place.get('date_visited', '') or '-':8}  {score:5.1f}  {place.get('name', '(unnamed)')}{where}"
+
+
+def cmd_list(core, args):
+    places = core.sorted_places(args.by)
+    for p in places[: args.limit] if args.limit else places:
+        print(_line(p))
+    return 0
+
+
+def cmd_query(core, args):
+    weights = {}
+    for spec in args.weight:
+        cat, _, w = spec.partition("=")
+        if cat not in core.categories:
+            print(f"unknown category: {cat}", file=sys.stderr)
+            return 2
+        weights[cat] = float(w or 1)
+    matches = core.search(args.search) if args.search else None
+    if matches is not None and not (weights or args.country or args.after or args.before):
+        for pid in matches[: args.k]:
+            print(_line(core.get(pid)))
+        return 0
+    k = len(core.store) if matches is not None else args.k
+    hits = core.rank(weights or None, k, args.country, args.after, args.before)
+    if matches is not None:
+        allowed = set(matches)
+        hits = [(s, p) for s, p in hits if p["id"] in allowed][: args.k]
+    for score, p in hits:
+        print(_line(p, score))
+    return 0
+
+
+def cmd_export(core, args):
+    data = [p.to_dict() for p in core.sorted_places("date")]
+    if args.output in (None, "-"):
+        json.dump(data, sys.stdout, indent=4, ensure_ascii=False)
+        sys.stdout.write("\n")
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=4, ensure_ascii=False)
+        print(f"exported {len(data)} places to {args.output}")
+    return 0
+
+
+def cmd_import(core, args):
+    def progress(n):
+        print(f"\r{n} records read", end="", file=sys.stderr, flush=True)
+
+    try:
+        records = iter_import_file(args.file, args.format, core.categories)
+        report = core.import_places(records, args.dry_run, progress)
+    except (OSError, ValueError) as e:
+        print(f"\nerror: {e}", file=sys.stderr)
+        return 1
+    print(file=sys.stderr)
+    for n, msg in report.errors:
+        print(f"record {n}: {msg}", file=sys.stderr)
+    print(("(dry run) " if args.dry_run else "") + str(report))
+    return 0
+
+
+def cmd_thumbs(core, args):
+    if not args.build:
+        print("nothing to do (pass --build)", file=sys.stderr)
+        return 2
+    start = time.perf_counter()
+
+    def progress(n, total):
+        if n == total or n % 100 == 0:
+            print(f"\r{n}/{total}", end="", file=sys.stderr, flush=True)
+
+    done, failed = core.build_thumbs((args.size, args.size), args.workers, progress)
+    elapsed = time.perf_counter() - start
+    print(f"\n{done} thumbnails ready, {failed} failed in {elapsed:.1f}s", file=sys.stderr)
+    return 0 if not failed else 1
+
+
+def cmd_migrate(core, args):
+    try:
+        count = core.migrate_to_sqlite()
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    print(f"copied {count} places to {core.store.path}; {core.data_path} is kept as a backup")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="passport", description=__doc__.splitlines()[0])
+    parser.add_argument("--data", default=DATA_PATH, help="path to places.json")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("list", help="list places")
+    p.add_argument("--by", choices=("date", "overall"), default="date")
+    p.add_argument("--limit", type=int, default=0)
+    p.set_defaults(func=cmd_list)
+
+    p = sub.add_parser("query", help="weighted ranking with filters")
+    p.add_argument("--weight", action="append", default=[], metavar="CATEGORY=W")
+    p.add_argument("--country")
+    p.add_argument("--after", help="exclusive YYYY or YYYY-MM lower bound")
+    p.add_argument("--before", help="exclusive YYYY or YYYY-MM upper bound")
+    p.add_argument("--search", help="only places matching these words")
+    p.add_argument("-k", type=int, default=20)
+    p.set_defaults(func=cmd_query)
+
+    p = sub.add_parser("export", help="write all places as JSON")
+    p.add_argument("-o", "--output")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("import", help="bulk-add places from JSON, CSV or GeoJSON")
+    p.add_argument("file")
+    p.add_argument("--format", choices=("json", "csv", "geojson"), help="default: from extension")
+    p.add_argument("--dry-run", action="store_true", help="validate and count only")
+    p.set_defaults(func=cmd_import)
+
+    p = sub.add_parser("thumbs", help="thumbnail cache maintenance")
+    p.add_argument("--build", action="store_true", help="pre-build gallery thumbnails")
+    p.add_argument("--size", type=int, default=200)
+    p.add_argument("--workers", type=int)
+    p.set_defaults(func=cmd_thumbs)
+
+    p = sub.add_parser("migrate", help="move places.json into an indexed SQLite database")
+    p.set_defaults(func=cmd_migrate)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    core = PassportCore(args.data)
+    try:
+        core.load(background=False)
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    try:
+        return args.func(core, args)
+    finally:
+        core.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
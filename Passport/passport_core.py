@@ -0,0 +1,1497 @@
+"""Headless Passport data layer: places store, indexes and photo caches.
+
+Nothing here imports tkinter, and PIL is only imported the first time an image is
+actually opened, so scripts and the CLI start quickly.
+"""
+import csv
+import hashlib
+import heapq
+import json
+import os
+import re
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from record_store import (  # noqa: E402,F401 - CorruptDataError is re-exported for the app
+    CorruptDataError,
+    Record,
+    RecordStore,
+    SqliteRecordStore,
+    atomic_write_json,
+    migrate_to_sqlite,
+    open_store,
+    sqlite_path,
+)
+
+DATA_PATH = os.path.join("Passport", "places.json")
+CATEGORIES = [
+    "food",
+    "scenery",
+    "safety",
+    "accessibility",
+    "value",
+    "culture",
+    "nightlife",
+    "nature",
+    "history",
+    "comfort",
+    "cleanliness",
+    "transport",
+    "friendliness",
+    "weather",
+]
+IMAGE_EXTS = {".jpg", ".jpeg", ".png", ".gif", ".bmp", ".tiff", ".webp"}
+THUMB_CACHE_MAX_BYTES = 256 * 1024 * 1024
+SHEET_CACHE_MAX_BYTES = 128 * 1024 * 1024
+JOURNAL_COMPACT_EVERY = 200
+EXIF_BATCH = 64
+DUPLICATE_RADIUS = 6
+SHEET_ROWS = 8
+PLACE_COLUMNS = {
+    "overall": "REAL",
+    "date_visited": "TEXT",
+    "country": "TEXT COLLATE NOCASE",
+    "name": "TEXT COLLATE NOCASE",
+}
+
+
+def pil_image():
+    from PIL import Image
+
+    return Image
+
+
+class ThumbnailCache:
+    """On-disk thumbnail store keyed by (path, mtime, size), evicted LRU by total bytes."""
+
+    def __init__(self, cache_dir, max_bytes=THUMB_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self.entries = OrderedDict()  # key -> {"file": name, "bytes": n}, oldest first
+        self.total_bytes = 0
+        self.dirty = False
+        self.lock = threading.RLock()
+        self._load_index()
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                for key, meta in json.load(f):
+                    if os.path.exists(os.path.join(self.cache_dir, meta["file"])):
+                        self.entries[key] = meta
+                        self.total_bytes += meta.get("bytes", 0)
+        except (OSError, ValueError, KeyError, TypeError):
+            self.entries.clear()
+            self.total_bytes = 0
+        self._evict()
+
+    def key_for(self, path, thumb_size):
+        st = os.stat(path)
+        raw = f"{os.path.abspath(path)}|{st.st_mtime_ns}|{st.st_size}|{thumb_size[0]}x{thumb_size[1]}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        with self.lock:
+            meta = self.entries.get(key)
+        if meta is None:
+            return None
+        try:
+            im = pil_image().open(os.path.join(self.cache_dir, meta["file"]))
+            im.load()
+        except Exception:
+            with self.lock:
+                self._drop(key)
+            return None
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.dirty = True
+        return im
+
+    def put(self, key, im):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        if im.mode in ("RGBA", "LA", "P"):
+            name, fmt = key + ".png", "PNG"
+        else:
+            name, fmt = key + ".jpg", "JPEG"
+            if im.mode != "RGB":
+                im = im.convert("RGB")
+        target = os.path.join(self.cache_dir, name)
+        with self.lock:
+            self._drop(key)
+        tmp = f"{target}.{threading.get_ident()}.tmp"
+        im.save(tmp, fmt)
+        os.replace(tmp, target)
+        size = os.path.getsize(target)
+        with self.lock:
+            self.entries[key] = {"file": name, "bytes": size}
+            self.total_bytes += size
+            self.dirty = True
+            self._evict()
+
+    def get_or_create(self, path, thumb_size):
+        key = self.key_for(path, thumb_size)
+        im = self.get(key)
+        if im is not None:
+            return im
+        with pil_image().open(path) as src:
+            src.thumbnail(thumb_size)
+            im = src.copy()
+        try:
+            self.put(key, im)
+        except OSError:
+            pass
+        return im
+
+    def _drop(self, key):
+        meta = self.entries.pop(key, None)
+        if meta is None:
+            return
+        self.total_bytes -= meta.get("bytes", 0)
+        self.dirty = True
+        try:
+            os.remove(os.path.join(self.cache_dir, meta["file"]))
+        except OSError:
+            pass
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and self.entries:
+            self._drop(next(iter(self.entries)))
+
+    def flush(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            items = list(self.entries.items())
+            self.dirty = False
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp = self.index_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(items, f)
+            os.replace(tmp, self.index_path)
+        except OSError:
+            with self.lock:
+                self.dirty = True
+
+
+class PhotoIndex:
+    """Per-photo_dir listing of image files, rescanning only directories whose mtime changed."""
+
+    def __init__(self, index_dir):
+        self.index_dir = index_dir
+        self.lock = threading.Lock()
+
+    def _index_path(self, root):
+        digest = hashlib.sha1(os.path.abspath(root).encode("utf-8")).hexdigest()
+        return os.path.join(self.index_dir, digest + ".json")
+
+    def _load(self, root):
+        try:
+            with open(self._index_path(root), "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("root") == os.path.abspath(root):
+                return data.get("dirs", {})
+        except (OSError, ValueError, AttributeError):
+            pass
+        return {}
+
+    def _save(self, root, dirs):
+        with self.lock:
+            try:
+                os.makedirs(self.index_dir, exist_ok=True)
+                target = self._index_path(root)
+                tmp = target + ".tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump({"root": os.path.abspath(root), "dirs": dirs}, f)
+                os.replace(tmp, target)
+            except OSError:
+                pass
+
+    def _scan_dir(self, path):
+        files, subdirs = [], []
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_file():
+                        if os.path.splitext(entry.name.lower())[1] in IMAGE_EXTS:
+                            files.append(entry.name)
+                    elif entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.name)
+                except OSError:
+                    continue
+        files.sort()
+        subdirs.sort()
+        return files, subdirs
+
+    def scan(self, root, recursive=True):
+        """Yield image paths under root in sorted, depth-first order as they are found."""
+        cached = self._load(root)
+        seen = {}
+        stack = [""]
+        while stack:
+            rel = stack.pop()
+            path = os.path.join(root, rel) if rel else root
+            try:
+                mtime = os.stat(path).st_mtime_ns
+                entry = cached.get(rel)
+                if entry is None or entry.get("mtime") != mtime:
+                    files, subdirs = self._scan_dir(path)
+                    entry = {"mtime": mtime, "files": files, "subdirs": subdirs}
+            except OSError:
+                if not rel:
+                    raise
+                continue
+            seen[rel] = entry
+            for name in entry["files"]:
+                yield os.path.join(path, name)
+            if recursive:
+                stack.extend(os.path.join(rel, d) for d in reversed(entry["subdirs"]))
+        if recursive:
+            self._save(root, seen)
+        else:
+            cached.update(seen)
+            self._save(root, cached)
+
+
+def _gps_degrees(values, ref):
+    d, m, sec = (float(v) for v in values)
+    deg = d + m / 60 + sec / 3600
+    return round(-deg if ref in ("S", "W") else deg, 6)
+
+
+def read_exif(path):
+    """(taken "YYYY-MM-DD HH:MM:SS", lat, lon, camera) from a photo's EXIF header, or
+    None if the file or its EXIF can't be read."""
+    taken = lat = lon = camera = None
+    try:
+        with pil_image().open(path) as im:
+            exif = im.getexif()
+        sub = exif.get_ifd(0x8769)
+        raw = sub.get(36867) or exif.get(306)
+        if isinstance(raw, str) and len(raw) >= 19:
+            taken = raw[:10].replace(":", "-") + raw[10:19]
+        gps = exif.get_ifd(0x8825)
+        try:
+            if 2 in gps and 4 in gps:
+                lat = _gps_degrees(gps[2], gps.get(1))
+                lon = _gps_degrees(gps[4], gps.get(3))
+        except (TypeError, ValueError, ZeroDivisionError):
+            lat = lon = None
+        make = str(exif.get(271, "")).strip("\x00 ")
+        model = str(exif.get(272, "")).strip("\x00 ")
+    except Exception:
+        return None
+    if model:
+        camera = model if not make or model.startswith(make) else f"{make} {model}"
+    return (taken, lat, lon, camera or make or None)
+
+
+def read_exif_batch(paths):
+    # one unreadable file mustn't fail the batch; it just has no facts
+    return [read_exif(p) or (None, None, None, None) for p in paths]
+
+
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+
+def process_pool(workers=None):
+    """The spawn-context process pool FileInfoIndex lookups share, started on first use
+    (workers only applies then)."""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            ctx = multiprocessing.get_context("spawn")
+            _process_pool = ProcessPoolExecutor(max_workers=workers, mp_context=ctx)
+        return _process_pool
+
+
+def _drop_process_pool(pool):
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is pool:
+            _process_pool = None
+    pool.shutdown(wait=False)
+
+
+class FileInfoIndex:
+    """Per-photo facts cached on disk keyed by path + mtime, computed on a process pool.
+
+    Subclasses set ``extract`` to a module-level function mapping a list of paths to a
+    list of tuples; rows are stored compactly as path -> [mtime_ns, *facts].
+    """
+
+    extract = None
+    batch_size = EXIF_BATCH
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.rows = None
+        self.dirty = False
+
+    def _ensure_loaded(self):
+        if self.rows is not None:
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.rows = json.load(f).get("files", {})
+        except (OSError, ValueError, AttributeError):
+            self.rows = {}
+
+    def lookup(self, paths, workers=None):
+        """{path: facts}, computing them only for new or changed files."""
+        out, stale, mtimes = {}, [], {}
+        with self.lock:
+            self._ensure_loaded()
+            for p in paths:
+                key = os.path.abspath(p)
+                try:
+                    mtime = os.stat(p).st_mtime_ns
+                except OSError:
+                    continue
+                row = self.rows.get(key)
+                if row is not None and row[0] == mtime:
+                    out[p] = tuple(row[1:])
+                else:
+                    stale.append(p)
+                    mtimes[p] = mtime
+        if stale:
+            size = self.batch_size
+            batches = [stale[i : i + size] for i in range(0, len(stale), size)]
+            if len(batches) == 1:
+                found = [self.extract(batches[0])]
+            else:
+                from concurrent.futures.process import BrokenProcessPool
+
+                pool = process_pool(workers)
+                try:
+                    found = list(pool.map(self.extract, batches))
+                except BrokenProcessPool:
+                    _drop_process_pool(pool)  # a worker died; start a fresh pool next time
+                    raise
+            with self.lock:
+                for batch, infos in zip(batches, found):
+                    for p, info in zip(batch, infos):
+                        out[p] = tuple(info)
+                        self.rows[os.path.abspath(p)] = [mtimes[p], *info]
+                self.dirty = True
+        return out
+
+    def flush(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            rows = dict(self.rows)
+            self.dirty = False
+        try:
+            atomic_write_json(self.path, {"files": rows}, separators=(",", ":"))
+        except OSError:
+            with self.lock:
+                self.dirty = True
+
+
+class ExifIndex(FileInfoIndex):
+    """(taken, lat, lon, camera) per photo, read from EXIF headers only."""
+
+    extract = staticmethod(read_exif_batch)
+
+
+def image_hashes(path):
+    """(aHash, dHash) of a photo as 64-bit ints, or (None, None) if it cannot be read."""
+    try:
+        with pil_image().open(path) as im:
+            im.draft("L", (64, 64))
+            gray = im.convert("L")
+    except Exception:
+        return (None, None)
+    small = list(gray.resize((8, 8), pil_image().BILINEAR).getdata())
+    mean = sum(small) / 64
+    ahash = 0
+    for v in small:
+        ahash = (ahash << 1) | (v > mean)
+    wide = list(gray.resize((9, 8), pil_image().BILINEAR).getdata())
+    dhash = 0
+    for r in range(8):
+        row = wide[r * 9 : r * 9 + 9]
+        for c in range(8):
+            dhash = (dhash << 1) | (row[c] > row[c + 1])
+    return (ahash, dhash)
+
+
+def image_hashes_batch(paths):
+    return [image_hashes(p) for p in paths]
+
+
+class HashIndex(FileInfoIndex):
+    """(aHash, dHash) per photo for duplicate detection."""
+
+    extract = staticmethod(image_hashes_batch)
+    batch_size = 32
+
+
+class BKTree:
+    """Burkhard-Keller tree over 64-bit hashes under Hamming distance."""
+
+    def __init__(self):
+        self.root = None  # [hash, [items], {distance: child}]
+
+    def add(self, h, item):
+        if self.root is None:
+            self.root = [h, [item], {}]
+            return
+        node = self.root
+        while True:
+            d = bin(node[0] ^ h).count("1")
+            if d == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(d)
+            if child is None:
+                node[2][d] = [h, [item], {}]
+                return
+            node = child
+
+    def within(self, h, radius):
+        """Items whose hash is within radius bits of h."""
+        out = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            d = bin(node[0] ^ h).count("1")
+            if d <= radius:
+                out.extend(node[1])
+            for dist, child in node[2].items():
+                if d - radius <= dist <= d + radius:
+                    stack.append(child)
+        return out
+
+
+def duplicate_clusters(hashes, radius=DUPLICATE_RADIUS):
+    """Group paths whose dHash and aHash are both within radius bits; clusters of 2+."""
+    parent = {}
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    tree = BKTree()
+    for p, (ahash, dhash) in hashes.items():
+        if dhash is None:
+            continue
+        parent[p] = p
+        for q in tree.within(dhash, radius):
+            if bin(hashes[q][0] ^ ahash).count("1") <= radius:
+                rp, rq = find(p), find(q)
+                if rp != rq:
+                    parent[rp] = rq
+        tree.add(dhash, p)
+    groups = {}
+    for p in parent:
+        groups.setdefault(find(p), []).append(p)
+    clusters = [sorted(g) for g in groups.values() if len(g) > 1]
+    clusters.sort(key=len, reverse=True)
+    return clusters
+
+
+class ContactSheetCache:
+    """Thumbnails composited into sprite sheets, cached on disk.
+
+    A sheet's file name is derived from the directory, the layout and the
+    (path, mtime, size) of every photo on it in order, so an unchanged sheet reloads
+    with a single decode, and differently ordered or filtered views of the same
+    directory get sheets of their own. Least recently used sheets are evicted once
+    the cache outgrows max_bytes.
+    """
+
+    def __init__(
+        self, cache_dir, thumb_cache, background="#2d2d2d", max_bytes=SHEET_CACHE_MAX_BYTES
+    ):
+        self.cache_dir = cache_dir
+        self.thumb_cache = thumb_cache
+        self.background = background
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def plan(paths, columns):
+        """paths split into per-sheet chunks, columns wide and SHEET_ROWS tall."""
+        per_sheet = columns * SHEET_ROWS
+        return [paths[start : start + per_sheet] for start in range(0, len(paths), per_sheet)]
+
+    def sheet_path(self, directory, paths, thumb_size, columns):
+        """Cache file for one sheet; stats every photo on it, so call it off the UI thread."""
+        dir_key = hashlib.sha1(os.path.abspath(directory).encode("utf-8")).hexdigest()[:16]
+        h = hashlib.sha1(f"{thumb_size}|{columns}".encode("utf-8"))
+        for p in paths:
+            try:
+                st = os.stat(p)
+                h.update(f"|{os.path.abspath(p)}|{st.st_mtime_ns}|{st.st_size}".encode("utf-8"))
+            except OSError:
+                h.update(f"|{p}|missing".encode("utf-8"))
+        return os.path.join(self.cache_dir, f"{dir_key}_{h.hexdigest()[:20]}.jpg")
+
+    def evict(self):
+        """Delete least recently used sheets until the cache fits in max_bytes."""
+        try:
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".jpg"):
+                    st = os.stat(os.path.join(self.cache_dir, name))
+                    entries.append((st.st_mtime, st.st_size, name))
+        except OSError:
+            return
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+                total -= size
+            except OSError:
+                pass
+
+    def ensure(self, directory, paths, thumb_size, columns):
+        """Path of the sheet for paths, building it if it isn't cached."""
+        sheet_path = self.sheet_path(directory, paths, thumb_size, columns)
+        if os.path.exists(sheet_path):
+            try:
+                os.utime(sheet_path)  # mtime doubles as last use for evict()
+            except OSError:
+                pass
+            return sheet_path
+        cw, ch = thumb_size
+        rows = (len(paths) + columns - 1) // columns
+        sheet = pil_image().new("RGB", (columns * cw, rows * ch), self.background)
+        for i, p in enumerate(paths):
+            try:
+                thumb = self.thumb_cache.get_or_create(p, thumb_size)
+            except Exception:
+                continue
+            r, c = divmod(i, columns)
+            x = c * cw + (cw - thumb.width) // 2
+            y = r * ch + (ch - thumb.height) // 2
+            if thumb.mode in ("RGBA", "LA", "P"):
+                thumb = thumb.convert("RGBA")
+                sheet.paste(thumb, (x, y), thumb)
+            else:
+                sheet.paste(thumb.convert("RGB"), (x, y))
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp = f"{sheet_path}.{threading.get_ident()}.tmp"
+        sheet.save(tmp, "JPEG", quality=90)
+        os.replace(tmp, sheet_path)
+        return sheet_path
+
+
+class Place(Record):
+    __slots__ = (
+        "id",
+        "name",
+        "country",
+        "date_visited",
+        "photo_dir",
+        "scores",
+        "overall",
+        "notes",
+        "modified",
+    )
+
+
+class PlaceStore(RecordStore):
+    """places.json snapshot plus an append-only journal of put/delete records."""
+
+    def __init__(self, path):
+        super().__init__(
+            path,
+            Place,
+            make_key=lambda p, n: f"{p.get('name', 'place')}_{n}",
+            journal_field="place",
+            compact_every=JOURNAL_COMPACT_EVERY,
+        )
+
+
+class PlaceDatabase(SqliteRecordStore):
+    """places.db: the SQLite backend, used instead of places.json once migrated."""
+
+    def __init__(self, path):
+        super().__init__(
+            path, Place, columns=PLACE_COLUMNS, text_fields=SearchIndex.FIELDS
+        )
+
+    def column_value(self, rec, name):
+        if name == "date_visited":
+            return rec.get(name, "0000-00")  # same default as PlaceIndex.sort_key
+        if name == "country":
+            return rec.get(name, "").strip()
+        return rec.get(name)
+
+
+class PlaceIndex:
+    """Places by id, plus their listbox order (newest date_visited first) kept with bisect."""
+
+    def __init__(self, places=()):
+        # ids are assigned once, by the store on load (or import_places); trusted here
+        self.by_id = {p["id"]: p for p in places}
+        # ascending (date_visited, id); listbox row r is keys[-1 - r]
+        self.keys = sorted(self.sort_key(p) for p in self.by_id.values())
+
+    @staticmethod
+    def sort_key(place):
+        return (place.get("date_visited", "0000-00"), place["id"])
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def __iter__(self):
+        return iter(self.by_id.values())
+
+    def get(self, pid):
+        return self.by_id.get(pid)
+
+    def at(self, row):
+        return self.by_id[self.keys[-1 - row][1]]
+
+    def row_of(self, pid):
+        pos = bisect_left(self.keys, self.sort_key(self.by_id[pid]))
+        return len(self.keys) - 1 - pos
+
+    def rows(self):
+        for _, pid in reversed(self.keys):
+            yield self.by_id[pid]
+
+    def add(self, place):
+        key = self.sort_key(place)
+        self.by_id[place["id"]] = place
+        insort(self.keys, key)
+        return len(self.keys) - 1 - bisect_left(self.keys, key)
+
+    def remove(self, pid):
+        row = self.row_of(pid)
+        del self.keys[len(self.keys) - 1 - row]
+        del self.by_id[pid]
+        return row
+
+
+class StorePlaceIndex:
+    """PlaceIndex's interface over places.db. Only the listbox order, (date_visited, id)
+    for every place, is read up front, from the indexed column; places are fetched by id."""
+
+    sort_key = staticmethod(PlaceIndex.sort_key)
+
+    def __init__(self, store):
+        self.store = store
+        self.key_of = {
+            pid: (date, pid) for pid, date in store.column_rows(("date_visited",))
+        }
+        self.keys = sorted(self.key_of.values())
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __iter__(self):
+        return iter(self.store)
+
+    def get(self, pid):
+        return self.store.get(pid)
+
+    def at(self, row):
+        return self.store.get(self.keys[-1 - row][1])
+
+    def row_of(self, pid):
+        return len(self.keys) - 1 - bisect_left(self.keys, self.key_of[pid])
+
+    def rows(self):
+        return self.store.select(order=PassportCore.LIST_ORDER)
+
+    def add(self, place):
+        key = self.key_of[place["id"]] = self.sort_key(place)
+        insort(self.keys, key)
+        return len(self.keys) - 1 - bisect_left(self.keys, key)
+
+    def remove(self, pid):
+        row = self.row_of(pid)
+        del self.keys[len(self.keys) - 1 - row]
+        del self.key_of[pid]
+        return row
+
+
+class SearchIndex:
+    """Token -> place ids over name, country and notes; query terms match as word prefixes."""
+
+    FIELDS = ("name", "country", "notes")
+
+    def __init__(self, places=()):
+        self.postings = {}
+        self.tokens = []  # sorted vocabulary for prefix ranges
+        self.doc_tokens = {}
+        for p in places:
+            self.put(p)
+
+    @staticmethod
+    def tokenize(text):
+        return re.findall(r"\w+", text.casefold())
+
+    def put(self, place):
+        pid = place["id"]
+        self.remove(pid)
+        toks = set()
+        for field in self.FIELDS:
+            toks.update(self.tokenize(str(place.get(field, ""))))
+        for t in toks:
+            ids = self.postings.get(t)
+            if ids is None:
+                ids = self.postings[t] = set()
+                insort(self.tokens, t)
+            ids.add(pid)
+        self.doc_tokens[pid] = toks
+
+    def remove(self, pid):
+        for t in self.doc_tokens.pop(pid, ()):
+            ids = self.postings[t]
+            ids.discard(pid)
+            if not ids:
+                del self.postings[t]
+                del self.tokens[bisect_left(self.tokens, t)]
+
+    def _prefix_ids(self, prefix):
+        out = set()
+        i = bisect_left(self.tokens, prefix)
+        while i < len(self.tokens) and self.tokens[i].startswith(prefix):
+            out |= self.postings[self.tokens[i]]
+            i += 1
+        return out
+
+    def search(self, query):
+        """Ids of places matching every term in query, or None for an empty query."""
+        terms = self.tokenize(query)
+        if not terms:
+            return None
+        result = None
+        for term in sorted(set(terms), key=len, reverse=True):
+            ids = self._prefix_ids(term)
+            result = ids if result is None else result & ids
+            if not result:
+                break
+        return result
+
+
+class ScoreMatrix:
+    """Column-per-category score arrays over the places store, for weighted top-k queries."""
+
+    def __init__(self, categories, places=()):
+        self.categories = list(categories)
+        self.columns = {c: array("B") for c in self.categories}
+        self.ids = []
+        self.countries = []
+        self.dates = []
+        self.row_of = {}
+        for p in places:
+            self.put(p)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def put(self, place):
+        pid = place["id"]
+        scores = place.get("scores", {})
+        row = self.row_of.get(pid)
+        if row is None:
+            row = self.row_of[pid] = len(self.ids)
+            self.ids.append(pid)
+            self.countries.append("")
+            self.dates.append("")
+            for col in self.columns.values():
+                col.append(0)
+        self.countries[row] = place.get("country", "").strip().casefold()
+        self.dates[row] = place.get("date_visited", "")
+        for c, col in self.columns.items():
+            col[row] = max(0, min(100, int(scores.get(c, 0))))
+
+    def remove(self, pid):
+        row = self.row_of.pop(pid, None)
+        if row is None:
+            return
+        last = len(self.ids) - 1
+        if row != last:
+            moved = self.ids[last]
+            self.ids[row] = moved
+            self.countries[row] = self.countries[last]
+            self.dates[row] = self.dates[last]
+            for col in self.columns.values():
+                col[row] = col[last]
+            self.row_of[moved] = row
+        self.ids.pop()
+        self.countries.pop()
+        self.dates.pop()
+        for col in self.columns.values():
+            col.pop()
+
+    def weighted(self, weights):
+        """Weighted mean score per row (0-100) for {category: weight}."""
+        n = len(self.ids)
+        weights = {c: float(w) for c, w in weights.items() if w and c in self.columns}
+        total_w = sum(weights.values())
+        if not total_w:
+            return [0.0] * n
+        totals = [0.0] * n
+        for c, w in weights.items():
+            totals = [t + w * v for t, v in zip(totals, self.columns[c])]
+        return [t / total_w for t in totals]
+
+    def top(self, weights, k=20, country=None, after=None, before=None):
+        """Best k (score, id) pairs; after/before are exclusive YYYY or YYYY-MM bounds."""
+        totals = self.weighted(weights or {c: 1 for c in self.categories})
+        rows = range(len(self.ids))
+        if country:
+            wanted = {country.strip().casefold()} if isinstance(country, str) else {
+                c.strip().casefold() for c in country
+            }
+            rows = [r for r in rows if self.countries[r] in wanted]
+        if after:
+            rows = [r for r in rows if self.dates[r] and self.dates[r][: len(after)] > after]
+        if before:
+            rows = [r for r in rows if self.dates[r] and self.dates[r][: len(before)] < before]
+        best = heapq.nlargest(k, rows, key=totals.__getitem__)
+        return [(round(totals[r], 1), self.ids[r]) for r in best]
+
+
+class PlaceStats:
+    """Running per-country, per-year and per-category sums, updated one place at a time."""
+
+    def __init__(self, categories, places=()):
+        self.categories = list(categories)
+        self.count = 0
+        self.cat_sums = [0] * len(self.categories)
+        # country key (stripped, casefolded, as ScoreMatrix filters) -> [visits,
+        # overall_sum, [per-category sums]]; country_names keeps a display spelling
+        self.countries = {}
+        self.country_names = {}
+        self.years = {}  # year -> [visits, overall_sum]
+        self.trend = [0, 0.0, 0.0, 0.0, 0.0]  # n, sum x, sum y, sum xy, sum x^2
+        for p in places:
+            self.add(p)
+
+    @staticmethod
+    def country_key(country):
+        return str(country or "").strip().casefold()
+
+    @staticmethod
+    def _when(place):
+        date = place.get("date_visited")
+        if not isinstance(date, str):
+            return None
+        try:
+            d = datetime.strptime(date, "%Y-%m")
+        except ValueError:
+            return None
+        return d.year, d.year + (d.month - 1) / 12
+
+    def _apply(self, place, sign):
+        scores = place.get("scores", {})
+        vals = [max(0, min(100, int(scores.get(c, 0)))) for c in self.categories]
+        overall = float(place.get("overall", 0))
+        self.count += sign
+        for i, v in enumerate(vals):
+            self.cat_sums[i] += sign * v
+        country = self.country_key(place.get("country")) or "(unknown)"
+        self.country_names.setdefault(country, str(place.get("country") or "").strip() or country)
+        agg = self.countries.setdefault(country, [0, 0.0, [0] * len(self.categories)])
+        agg[0] += sign
+        agg[1] += sign * overall
+        for i, v in enumerate(vals):
+            agg[2][i] += sign * v
+        if agg[0] == 0:
+            del self.countries[country]
+            del self.country_names[country]
+        when = self._when(place)
+        if when is not None:
+            year, x = when
+            ya = self.years.setdefault(year, [0, 0.0])
+            ya[0] += sign
+            ya[1] += sign * overall
+            if ya[0] == 0:
+                del self.years[year]
+            t = self.trend
+            t[0] += sign
+            t[1] += sign * x
+            t[2] += sign * overall
+            t[3] += sign * x * overall
+            t[4] += sign * x * x
+
+    def add(self, place):
+        self._apply(place, 1)
+
+    def remove(self, place):
+        self._apply(place, -1)
+
+    def category_averages(self, country=None):
+        if country is None:
+            n, sums = self.count, self.cat_sums
+        else:
+            n, _, sums = self.countries[self.country_key(country) or "(unknown)"]
+        if not n:
+            return {}
+        return {c: sums[i] / n for i, c in enumerate(self.categories)}
+
+    def best_worst(self, country=None):
+        avgs = self.category_averages(country)
+        if not avgs:
+            return None, None
+        return max(avgs, key=avgs.get), min(avgs, key=avgs.get)
+
+    def per_year(self):
+        """[(year, visits, average overall)] in year order."""
+        return [(y, n, total / n) for y, (n, total) in sorted(self.years.items())]
+
+    def trend_line(self):
+        """(slope per year, intercept) of overall vs. visit date, or None with < 2 points."""
+        n, sx, sy, sxy, sxx = self.trend
+        denom = n * sxx - sx * sx
+        if n < 2 or abs(denom) < 1e-9:
+            return None
+        slope = (n * sxy - sx * sy) / denom
+        return slope, (sy - slope * sx) / n
+
+
+# ---------- bulk import ----------
+IMPORT_FIELDS = ("id", "name", "country", "date_visited", "photo_dir", "notes")
+
+
+def _iter_json_array(f, key=None, chunk_size=1 << 16):
+    """Yield the elements of a top-level JSON list, or of the list under `key` in a
+    top-level object, decoding one element at a time from fixed-size reads."""
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    eof = False
+
+    def fill():
+        nonlocal buf, pos, eof
+        chunk = f.read(chunk_size)
+        if not chunk:
+            eof = True
+        buf = buf[pos:] + chunk
+        pos = 0
+
+    def skip_ws():
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n":
+                pos += 1
+            if pos < len(buf) or eof:
+                return
+            fill()
+
+    def expect(ch):
+        nonlocal pos
+        skip_ws()
+        if pos >= len(buf) or buf[pos] != ch:
+            raise ValueError(f"expected {ch!r} in import file")
+        pos += 1
+
+    def decode():
+        nonlocal pos
+        skip_ws()
+        while True:
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                fill()
+                continue
+            if end < len(buf) or eof:  # a number could run on into the next read
+                pos = end
+                return value
+            fill()
+
+    if key is not None:
+        # walk the top-level object's members, decoding (and dropping) the others
+        expect("{")
+        while decode() != key:
+            expect(":")
+            decode()
+            expect(",")
+        expect(":")
+    expect("[")
+    skip_ws()
+    if pos < len(buf) and buf[pos] == "]":
+        return
+    while True:
+        yield decode()
+        skip_ws()
+        if pos < len(buf) and buf[pos] == "]":
+            return
+        expect(",")
+
+
+def iter_json_places(path):
+    with open(path, "r", encoding="utf-8") as f:
+        yield from _iter_json_array(f)
+
+
+def iter_geojson_places(path):
+    """Places from a FeatureCollection; Point geometry is kept as lon/lat."""
+    with open(path, "r", encoding="utf-8") as f:
+        for feature in _iter_json_array(f, "features"):
+            props = dict(feature.get("properties") or {})
+            geom = feature.get("geometry") or {}
+            if geom.get("type") == "Point" and len(geom.get("coordinates") or ()) >= 2:
+                props["lon"], props["lat"] = geom["coordinates"][:2]
+            yield props
+
+
+def iter_csv_places(path, categories=CATEGORIES):
+    """One place per row; category scores come from columns named after the category
+    (or "score_<category>")."""
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        for row in csv.DictReader(f):
+            place = {k: (row.get(k) or "").strip() for k in IMPORT_FIELDS if k in row}
+            scores = {}
+            for c in categories:
+                raw = row.get(c, row.get(f"score_{c}"))
+                if raw not in (None, ""):
+                    scores[c] = raw.strip()
+            place["scores"] = scores
+            yield place
+
+
+def iter_import_file(path, fmt=None, categories=CATEGORIES):
+    fmt = fmt or os.path.splitext(path)[1].lower().lstrip(".")
+    if fmt == "csv":
+        return iter_csv_places(path, categories)
+    if fmt == "geojson":
+        return iter_geojson_places(path)
+    if fmt == "json":
+        return iter_json_places(path)
+    raise ValueError(f"unsupported import format: {fmt or path}")
+
+
+def _normalize_date(value):
+    """Accept the usual spellings of a visit date and store them as YYYY-MM (or YYYY)."""
+    value = str(value or "").strip()
+    if re.fullmatch(r"\d{4}-(0[1-9]|1[0-2])", value):
+        return value
+    if value[:4].isdigit():
+        value = value.partition("T")[0]
+    if not value or re.fullmatch(r"\d{4}", value):
+        return value
+    for fmt in ("%Y-%m", "%Y-%m-%d", "%Y/%m", "%Y/%m/%d", "%B %Y", "%b %Y"):
+        try:
+            return datetime.strptime(value, fmt).strftime("%Y-%m")
+        except ValueError:
+            continue
+    raise ValueError(f"unrecognised date_visited {value!r}")
+
+
+class ImportReport:
+    __slots__ = ("added", "duplicates", "invalid", "errors", "seconds")
+
+    def __init__(self):
+        self.added = self.duplicates = self.invalid = 0
+        self.errors = []  # (record number, message), first few only
+        self.seconds = 0.0
+
+    @property
+    def rate(self):
+        total = self.added + self.duplicates + self.invalid
+        return total / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        return (
+            f"imported {self.added} places, {self.duplicates} duplicates skipped, "
+            f"{self.invalid} invalid in {self.seconds:.2f}s ({self.rate:,.0f} records/s)"
+        )
+
+
+class PassportCore:
+    """Places plus every derived index, without any UI.
+
+    The Tk app and the CLI both drive this: put()/remove() keep the sorted view,
+    score matrix, search index and stats in step, and flush() persists the changes
+    through the store: places.json and its journal, or places.db once
+    migrate_to_sqlite() has made it. The indexes are built on first use. With the
+    database, the sorted view holds only the listbox order, and the sorted list,
+    unweighted top-k and search are answered by indexed queries, so opening it reads
+    no place until one is shown.
+    """
+
+    def __init__(self, data_path=DATA_PATH, categories=CATEGORIES):
+        self.data_path = data_path
+        self.categories = list(categories)
+        self.folder = os.path.dirname(data_path)
+        self.store = open_store(PlaceStore(data_path), PlaceDatabase(sqlite_path(data_path)))
+        self.sql = isinstance(self.store, SqliteRecordStore)
+        self._reset_indexes()
+        self._thumb_cache = None
+        self._photo_index = None
+        self._exif_index = None
+        self._hash_index = None
+        self._sheet_cache = None
+
+    def _reset_indexes(self):
+        self._places = None
+        self._score_matrix = None
+        self._search_index = None
+        self._stats = None
+
+    def load(self, background=True):
+        """Load places.json and its journal, or open places.db; raises
+        CorruptDataError or OSError. background=False compacts a leftover journal
+        before returning."""
+        if self.folder and not os.path.exists(self.folder):
+            os.makedirs(self.folder)
+        self.store.load(background)
+        self._reset_indexes()
+        return self
+
+    # ---------- indexes (built on first use) ----------
+    @property
+    def places(self):
+        if self._places is None:
+            self._places = StorePlaceIndex(self.store) if self.sql else PlaceIndex(self.store)
+        return self._places
+
+    @property
+    def score_matrix(self):
+        if self._score_matrix is None:
+            self._score_matrix = ScoreMatrix(self.categories, self.places)
+        return self._score_matrix
+
+    @property
+    def search_index(self):
+        if self._search_index is None:
+            self._search_index = SearchIndex(self.places)
+        return self._search_index
+
+    @property
+    def stats(self):
+        if self._stats is None:
+            self._stats = PlaceStats(self.categories, self.places)
+        return self._stats
+
+    def migrate_to_sqlite(self):
+        """One-shot copy of places.json (and its journal) into places.db, which is
+        used from then on; places.json is kept as a backup. Returns the count copied."""
+        if self.sql:
+            raise ValueError(f"already using {self.store.path}")
+        db = PlaceDatabase(sqlite_path(self.data_path))
+        count = migrate_to_sqlite(self.store, db)
+        self.store = db
+        self.sql = True
+        self._reset_indexes()
+        return count
+
+    # ---------- photo caches (created on first use) ----------
+    @property
+    def thumb_cache(self):
+        if self._thumb_cache is None:
+            self._thumb_cache = ThumbnailCache(os.path.join(self.folder, "thumbs"))
+        return self._thumb_cache
+
+    @property
+    def photo_index(self):
+        if self._photo_index is None:
+            self._photo_index = PhotoIndex(os.path.join(self.folder, "photo_index"))
+        return self._photo_index
+
+    @property
+    def exif_index(self):
+        if self._exif_index is None:
+            self._exif_index = ExifIndex(os.path.join(self.folder, "exif_index.json"))
+        return self._exif_index
+
+    @property
+    def hash_index(self):
+        if self._hash_index is None:
+            self._hash_index = HashIndex(os.path.join(self.folder, "phash_index.json"))
+        return self._hash_index
+
+    @property
+    def sheet_cache(self):
+        if self._sheet_cache is None:
+            self._sheet_cache = ContactSheetCache(
+                os.path.join(self.folder, "sheets"), self.thumb_cache
+            )
+        return self._sheet_cache
+
+    # ---------- records ----------
+    def compute_overall(self, scores: dict) -> float:
+        if not scores:
+            return 0.0
+        vals = [max(0, min(100, int(scores.get(c, 0)))) for c in self.categories]
+        return round(sum(vals) / len(vals), 1)
+
+    def put(self, entry):
+        """Add or replace a place (marked for the next flush()); returns (old listbox
+        row or None, new row)."""
+        old = self.places.get(entry["id"])
+        entry = self.store.put(entry)
+        old_row = None if old is None else self.places.remove(entry["id"])
+        row = self.places.add(entry)
+        if self._stats is not None:
+            if old is not None:
+                self._stats.remove(old)
+            self._stats.add(entry)
+        if self._score_matrix is not None:
+            self._score_matrix.put(entry)
+        if self._search_index is not None:
+            self._search_index.put(entry)
+        return old_row, row
+
+    def remove(self, pid):
+        """Drop a place (marked for the next flush()); returns the listbox row it occupied.
+        Raises KeyError for an unknown pid."""
+        place = self.places.get(pid)
+        if place is None:
+            raise KeyError(pid)
+        self.store.delete(pid)
+        row = self.places.remove(pid)
+        if self._stats is not None:
+            self._stats.remove(place)
+        if self._score_matrix is not None:
+            self._score_matrix.remove(pid)
+        if self._search_index is not None:
+            self._search_index.remove(pid)
+        return row
+
+    def flush(self):
+        """Journal every put()/remove() since the last flush."""
+        self.store.flush()
+
+    def save_all(self):
+        if self.sql:
+            self.store.flush()  # the database already holds every put()
+        else:
+            self.store.save_all(list(self.places))
+
+    def close(self):
+        """Wait for a journal compaction in progress, or close places.db."""
+        self.store.close()
+
+    def _natural_key(self, place):
+        return (
+            str(place.get("name", "")).strip().casefold(),
+            str(place.get("country", "")).strip().casefold(),
+            place.get("date_visited", ""),
+        )
+
+    def validate(self, raw):
+        """A clean place entry from an imported record, or ValueError."""
+        name = str(raw.get("name") or "").strip()
+        if not name:
+            raise ValueError("missing name")
+        scores = {}
+        for c in self.categories:
+            v = (raw.get("scores") or {}).get(c, raw.get(c, 0))
+            try:
+                scores[c] = max(0, min(100, int(float(v or 0))))
+            except (TypeError, ValueError):
+                raise ValueError(f"score {c}={v!r} is not a number") from None
+        entry = {
+            "id": str(raw.get("id") or "").strip(),
+            "name": name,
+            "country": str(raw.get("country") or "").strip(),
+            "date_visited": _normalize_date(raw.get("date_visited")),
+            "photo_dir": str(raw.get("photo_dir") or "").strip(),
+            "scores": scores,
+            "overall": self.compute_overall(scores),
+            "notes": str(raw.get("notes") or "").strip(),
+            "modified": raw.get("modified") or datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        for k in ("lat", "lon"):
+            if raw.get(k) not in (None, ""):
+                entry[k] = float(raw[k])
+        return entry
+
+    def import_places(self, records, dry_run=False, progress=None):
+        """Validate and add a stream of raw records, skipping ids (or name, country,
+        date) that are already known, then write everything with one save_all().
+
+        The indexes are dropped once at the end (and rebuilt on next use) rather than
+        updated per record.
+        """
+        report = ImportReport()
+        start = time.perf_counter()
+        seen_ids, seen_keys = set(), set()
+        for p in self.places:
+            seen_ids.add(p["id"])
+            seen_keys.add(self._natural_key(p))
+        stamp = datetime.now().timestamp()
+        added = []
+        for n, raw in enumerate(records, 1):
+            try:
+                entry = self.validate(raw)
+            except (AttributeError, TypeError, ValueError) as e:
+                report.invalid += 1
+                if len(report.errors) < 20:
+                    report.errors.append((n, str(e)))
+                continue
+            key = self._natural_key(entry)
+            if entry["id"] in seen_ids or key in seen_keys:
+                report.duplicates += 1
+                continue
+            if not entry["id"]:
+                entry["id"] = f"{entry['name']}_{stamp}_{n}"
+            seen_ids.add(entry["id"])
+            seen_keys.add(key)
+            added.append(entry)
+            if progress is not None and n % 1000 == 0:
+                progress(n)
+        if added and not dry_run:
+            merged = list(self.places) + [Place(e) for e in added]
+            self.store.save_all(merged)  # nothing changes in memory if this raises
+            self._reset_indexes()
+        report.added = len(added)
+        report.seconds = time.perf_counter() - start
+        return report
+
+    # ---------- queries ----------
+    LIST_ORDER = ("-date_visited", "-id")  # PlaceIndex's listbox order, as store columns
+
+    def get(self, pid):
+        return self.places.get(pid)
+
+    def pages(self, size):
+        """Places in listbox order (newest first), size at a time, for filling the
+        list incrementally; with the database they come straight from its cursor."""
+        if self.sql:
+            yield from self.store.pages(size, order=self.LIST_ORDER)
+            return
+        rows = list(self.places.rows())
+        for i in range(0, len(rows), size):
+            yield rows[i : i + size]
+
+    def sorted_places(self, by="date"):
+        if self.sql:
+            order = self.LIST_ORDER if by == "date" else ("-overall", "id")
+            return list(self.store.select(order=order))
+        if by == "date":
+            return list(self.places.rows())
+        return sorted(self.places, key=lambda p: p.get("overall", 0), reverse=True)
+
+    @staticmethod
+    def _filter_sql(country=None, after=None, before=None):
+        """WHERE clause for rank()'s filters, matching ScoreMatrix.top()."""
+        clauses, params = [], []
+        if country:
+            wanted = [country] if isinstance(country, str) else list(country)
+            clauses.append(f"country IN ({', '.join('?' * len(wanted))})")
+            params.extend(c.strip() for c in wanted)
+        if after or before:
+            clauses.append("date_visited NOT IN ('', '0000-00')")
+        if after:
+            # date[:len(after)] > after, in a form the index can use ("~" sorts after "-")
+            clauses.append("date_visited > ?")
+            params.append(after + "~")
+        if before:
+            clauses.append("date_visited < ?")
+            params.append(before)
+        return " AND ".join(clauses) or None, params
+
+    def _weighted_score(self, place, weights):
+        weights = {c: float(w) for c, w in weights.items() if w and c in self.categories}
+        total_w = sum(weights.values())
+        if not total_w:
+            return 0.0
+        scores = place.get("scores", {})
+        total = sum(w * max(0, min(100, int(scores.get(c, 0)))) for c, w in weights.items())
+        return total / total_w
+
+    def rank(self, weights=None, k=20, country=None, after=None, before=None):
+        """Top-k places as (weighted score, place), e.g. rank({"food": 2, "nature": 1},
+        country="Japan", after="2019")."""
+        if self.sql and (not weights or self._score_matrix is None):
+            where, params = self._filter_sql(country, after, before)
+            if not weights:
+                # overall is the unweighted mean, so this is a walk down its index
+                rows = self.store.select(where, params, order=("-overall", "id"), limit=k)
+                return [(p.get("overall", 0), p) for p in rows]
+            best = heapq.nlargest(
+                k, self.store.select(where, params), key=lambda p: self._weighted_score(p, weights)
+            )
+            return [(round(self._weighted_score(p, weights), 1), p) for p in best]
+        hits = self.score_matrix.top(weights, k, country, after, before)
+        return [(score, self.places.get(pid)) for score, pid in hits]
+
+    def search(self, query):
+        """Matching place ids newest first, or None for an empty query."""
+        if self.sql:
+            if self.store.match_expr(query) is None:
+                return None
+            return [p["id"] for p in self.store.select(order=self.LIST_ORDER, match=query)]
+        ids = self.search_index.search(query)
+        if ids is None:
+            return None
+        return sorted(
+            ids, key=lambda pid: self.places.sort_key(self.places.get(pid)), reverse=True
+        )
+
+    # ---------- photos ----------
+    def photo_dir_snapshot(self):
+        """Every place's photo_dir as a plain list, safe to hand to a worker thread."""
+        return [p.get("photo_dir") for p in self.places]
+
+    def photo_dirs(self, dirs=None):
+        """Existing photo directories, once each; dirs defaults to photo_dir_snapshot()."""
+        seen = {}
+        for d in self.photo_dir_snapshot() if dirs is None else dirs:
+            if d and os.path.isdir(d):
+                seen.setdefault(os.path.abspath(d), d)
+        return list(seen.values())
+
+    def list_images(self, dir_path, recursive=True):
+        return list(self.photo_index.scan(dir_path, recursive))
+
+    def find_duplicates(self, radius=DUPLICATE_RADIUS, dirs=None):
+        """Clusters of near-identical photos across every place's photo_dir.
+
+        Off the main thread, pass dirs from photo_dir_snapshot() taken on it, since
+        places can be added or removed meanwhile."""
+        paths = []
+        for d in self.photo_dirs(dirs):
+            paths.extend(self.photo_index.scan(d))
+        paths = list(dict.fromkeys(os.path.abspath(p) for p in paths))
+        hashes = self.hash_index.lookup(paths)
+        self.hash_index.flush()
+        return duplicate_clusters(hashes, radius)
+
+    def build_thumbs(self, thumb_size=(200, 200), workers=None, progress=None):
+        """Fill the thumbnail cache for every photo_dir; returns (built or found, failed)."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        paths = []
+        for d in self.photo_dirs():
+            paths.extend(self.photo_index.scan(d))
+        done = failed = 0
+
+        def one(p):
+            self.thumb_cache.get_or_create(p, thumb_size)
+
+        with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 4) as pool:
+            futures = [pool.submit(one, p) for p in paths]
+            for f in futures:
+                try:
+                    f.result()
+                    done += 1
+                except Exception:
+                    failed += 1
+                if progress is not None:
+                    progress(done + failed, len(paths))
+        self.thumb_cache.flush()
+        return done, failed
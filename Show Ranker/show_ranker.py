@@ -1,9 +1,805 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
+import argparse
+import heapq
 import json
+import math
 import os
+import random
+import re
+import sys
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from collections import deque
 from datetime import datetime
 
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from record_store import (  # noqa: E402
+    CorruptDataError,
+    Record,
+    RecordStore,
+    SqliteRecordStore,
+    atomic_write_json,
+    migrate_to_sqlite,
+    open_store,
+    sqlite_path,
+)
+
+UNSCORED = 255  # category added after the show was scored; left out of its mean
+ELO_START = 1500.0
+ELO_K_MIN = 16.0
+ELO_K_MAX = 64.0
+PAIRWISE_WINDOW = 3  # candidate opponents: this many neighbours below in the rating order
+PAIRWISE_RECENT = 8  # pairs not to repeat back to back
+PAIRWISE_STABLE_INFO = 0.1
+SIMILAR_K = 8
+NEUTRAL_SCORE = 50  # vectors are centred here so "like this" means the same strengths
+BM25_K1 = 1.2
+BM25_B = 0.75
+NAME_BOOST = 3  # a name token counts as this many comment tokens
+SEARCH_DEBOUNCE_MS = 150
+SEARCH_RESULTS = 50
+HISTORY_CHECKPOINT_EVERY = 500
+DATA_PATH = os.path.join("Show Ranker", "shows.json")
+SHOW_COLUMNS = {"overall": "REAL", "name": "TEXT COLLATE NOCASE"}  # indexed in shows.db
+LIST_PAGE = 500  # listbox rows inserted per event-loop turn
+TIERS = (("S", 0.90), ("A", 0.70), ("B", 0.40), ("C", 0.15), ("D", 0.0))  # lowest percentile
+TIER_COLORS = {"S": "#ff7f7f", "A": "#ffbf7f", "B": "#ffdf7f", "C": "#bfff7f", "D": "#7fbfff"}
+
+
+class Show(Record):
+    __slots__ = ("id", "name", "scores", "overall", "comments", "modified")
+
+
+def show_stores(data_path=DATA_PATH):
+    """shows.json's store and its SQLite alternative, shows.db (used once it exists)."""
+    json_store = RecordStore(
+        data_path, Show, make_key=lambda s, n: f"{s.get('name', 'show')}_{n}"
+    )
+    db_store = SqliteRecordStore(
+        sqlite_path(data_path), Show, columns=SHOW_COLUMNS, text_fields=("name", "comments")
+    )
+    return json_store, db_store
+
+
+class ShowIndex:
+    """Shows by id, plus their listbox order (highest overall first) kept with bisect."""
+
+    def __init__(self, shows=()):
+        # ids are trusted: the store gives every show a unique one when it loads
+        self.by_id = {s["id"]: s for s in shows}
+        self.reindex()
+
+    @staticmethod
+    def sort_key(show):
+        # ascending (-overall, id) so listbox row r is keys[r]
+        return (-show.get("overall", 0), show["id"])
+
+    def reindex(self):
+        """Re-sort after overall changed for many shows at once (e.g. new weights)."""
+        self.keys = sorted(self.sort_key(s) for s in self.by_id.values())
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def __iter__(self):
+        return iter(self.by_id.values())
+
+    def __contains__(self, sid):
+        return sid in self.by_id
+
+    def ids(self):
+        return list(self.by_id)
+
+    def get(self, sid):
+        return self.by_id.get(sid)
+
+    def at(self, row):
+        return self.by_id[self.keys[row][1]]
+
+    def row_of(self, sid):
+        return bisect_left(self.keys, self.sort_key(self.by_id[sid]))
+
+    def rows(self):
+        for _, sid in self.keys:
+            yield self.by_id[sid]
+
+    def put(self, show):
+        """Add or replace a show; returns (its old row or None, its new row)."""
+        old_row = self.remove(show["id"]) if show["id"] in self.by_id else None
+        key = self.sort_key(show)
+        self.by_id[show["id"]] = show
+        insort(self.keys, key)
+        return old_row, bisect_left(self.keys, key)
+
+    def remove(self, sid):
+        row = self.row_of(sid)
+        del self.keys[row]
+        del self.by_id[sid]
+        return row
+
+
+class StoreShowIndex:
+    """ShowIndex's interface over shows.db. Only the listbox order, (-overall, id) for
+    every show, is read up front, from the indexed column; shows are fetched by id."""
+
+    sort_key = staticmethod(ShowIndex.sort_key)
+
+    def __init__(self, store):
+        self.store = store
+        self.reindex()
+
+    def reindex(self):
+        self.key_of = {
+            sid: (-(overall or 0), sid) for sid, overall in self.store.column_rows(("overall",))
+        }
+        self.keys = sorted(self.key_of.values())
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __iter__(self):
+        return iter(self.store)
+
+    def __contains__(self, sid):
+        return sid in self.key_of
+
+    def ids(self):
+        return list(self.key_of)
+
+    def get(self, sid):
+        return self.store.get(sid)
+
+    def at(self, row):
+        return self.store.get(self.keys[row][1])
+
+    def row_of(self, sid):
+        return bisect_left(self.keys, self.key_of[sid])
+
+    def rows(self):
+        return self.store.select(order=("-overall", "id"))
+
+    def put(self, show):
+        """Record a show's new place (the store already has it); returns (its old row
+        or None, its new row)."""
+        old_row = self.remove(show["id"]) if show["id"] in self.key_of else None
+        key = self.key_of[show["id"]] = self.sort_key(show)
+        insort(self.keys, key)
+        return old_row, bisect_left(self.keys, key)
+
+    def remove(self, sid):
+        row = self.row_of(sid)
+        del self.keys[row]
+        del self.key_of[sid]
+        return row
+
+
+class ShowSearchIndex:
+    """BM25 inverted index over show names and comments, with prefix matching.
+
+    Each show's term counts are saved with a checksum of its text, so on startup only
+    shows whose name or comments changed since the last save are re-tokenised.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path):
+        self.path = path
+        self.doc_terms = {}  # id -> {term: tf}
+        self.doc_sig = {}
+        self.doc_len = {}
+        self.total_len = 0
+        self.postings = {}  # term -> {id: tf}
+        self.vocab = []  # sorted terms, for prefix ranges
+        self.dirty = False
+
+    @staticmethod
+    def tokenize(text):
+        return re.findall(r"\w+", text.casefold())
+
+    @staticmethod
+    def signature(show):
+        text = f"{show.get('name', '')}\0{show.get('comments', '')}"
+        return zlib.crc32(text.encode("utf-8"))
+
+    def _terms(self, show):
+        tf = {}
+        for t in self.tokenize(show.get("name", "")):
+            tf[t] = tf.get(t, 0) + NAME_BOOST
+        for t in self.tokenize(show.get("comments", "")):
+            tf[t] = tf.get(t, 0) + 1
+        return tf
+
+    def load(self, shows):
+        saved = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == self.VERSION:
+                saved = data.get("docs", {})
+        except (OSError, ValueError, AttributeError):
+            pass
+        for show in shows:
+            sig = self.signature(show)
+            doc = saved.pop(show["id"], None)
+            if doc is not None and doc[0] == sig:
+                self._add(show["id"], sig, doc[1], bulk=True)
+            else:
+                self._add(show["id"], sig, self._terms(show), bulk=True)
+                self.dirty = True
+        self.dirty = self.dirty or bool(saved)
+        self.vocab = sorted(self.postings)
+        return self
+
+    def save(self):
+        if not self.dirty:
+            return
+        docs = {sid: [self.doc_sig[sid], tf] for sid, tf in self.doc_terms.items()}
+        atomic_write_json(self.path, {"version": self.VERSION, "docs": docs}, ensure_ascii=False)
+        self.dirty = False
+
+    def _add(self, sid, sig, tf, bulk=False):
+        self.doc_terms[sid] = tf
+        self.doc_sig[sid] = sig
+        self.doc_len[sid] = n = sum(tf.values())
+        self.total_len += n
+        for t, c in tf.items():
+            posting = self.postings.get(t)
+            if posting is None:
+                posting = self.postings[t] = {}
+                if not bulk:
+                    insort(self.vocab, t)
+            posting[sid] = c
+
+    def put(self, show):
+        sig = self.signature(show)
+        if self.doc_sig.get(show["id"]) == sig:
+            return
+        self.remove(show["id"])
+        self._add(show["id"], sig, self._terms(show))
+        self.dirty = True
+
+    def remove(self, sid):
+        tf = self.doc_terms.pop(sid, None)
+        if tf is None:
+            return
+        del self.doc_sig[sid]
+        self.total_len -= self.doc_len.pop(sid)
+        for t in tf:
+            posting = self.postings[t]
+            del posting[sid]
+            if not posting:
+                del self.postings[t]
+                del self.vocab[bisect_left(self.vocab, t)]
+        self.dirty = True
+
+    def expand(self, prefix):
+        lo = bisect_left(self.vocab, prefix)
+        hi = bisect_left(self.vocab, prefix + "\U0010ffff")
+        return self.vocab[lo:hi]
+
+    def search(self, query, k=SEARCH_RESULTS):
+        """Top-k (score, id) by BM25; each query word also matches longer words it
+        starts, so "ost" finds "OST" and "osts"."""
+        n = len(self.doc_terms)
+        if not n:
+            return []
+        avgdl = self.total_len / n or 1.0
+        scores = {}
+        for word in set(self.tokenize(query)):
+            # the word and its completions act as one term: pooled tf and df
+            tfs = {}
+            for t in self.expand(word):
+                weight = 1.0 if t == word else 0.8  # exact words rank above completions
+                for sid, tf in self.postings[t].items():
+                    tfs[sid] = tfs.get(sid, 0.0) + weight * tf
+            idf = math.log(1 + (n - len(tfs) + 0.5) / (len(tfs) + 0.5))
+            for sid, tf in tfs.items():
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_len[sid] / avgdl)
+                scores[sid] = scores.get(sid, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+        best = heapq.nlargest(k, scores.items(), key=lambda kv: kv[1])
+        return [(round(s, 2), sid) for sid, s in best]
+
+
+class StoreSearch:
+    """ShowSearchIndex's interface over shows.db's full-text table. The store keeps
+    that table current on every put/delete, so there is nothing to build or save."""
+
+    def __init__(self, store):
+        self.store = store
+
+    def load(self, shows):
+        return self
+
+    def put(self, show):
+        pass
+
+    def remove(self, sid):
+        pass
+
+    def save(self):
+        pass
+
+    def search(self, query, k=SEARCH_RESULTS):
+        hits = self.store.search(query, k, weights=(NAME_BOOST, 1))
+        return [(round(score, 2), show["id"]) for score, show in hits]
+
+
+class TierIndex:
+    """Sorted overall and per-category score lists, for percentile-based tiers.
+
+    A save moves one value per list (bisect to find it, then insert/delete), so a
+    show's percentile and tier are a couple of binary searches away at any time.
+    """
+
+    def __init__(self, categories, shows=()):
+        self.categories = list(categories)
+        self.values = {dim: [] for dim in ["overall", *self.categories]}
+        # one pass over shows: with shows.db each pass is a full table read
+        for s in shows:
+            for dim, v in self._points(s):
+                self.values[dim].append(v)
+        for vals in self.values.values():
+            vals.sort()
+
+    def _points(self, show):
+        yield "overall", show.get("overall", 0)
+        scores = show.get("scores", {})
+        for c in self.categories:
+            if c in scores:
+                yield c, max(0, min(100, int(scores[c])))
+
+    def add(self, show):
+        for dim, v in self._points(show):
+            insort(self.values[dim], v)
+
+    def remove(self, show):
+        for dim, v in self._points(show):
+            vals = self.values[dim]
+            i = bisect_left(vals, v)
+            if i < len(vals) and vals[i] == v:
+                del vals[i]
+
+    def reset(self, dim, values):
+        self.values[dim] = sorted(values)
+
+    def percentile(self, dim, value):
+        """Share of the library below value (ties count half), 0-1."""
+        vals = self.values[dim]
+        if not vals:
+            return 0.0
+        return (bisect_left(vals, value) + bisect_right(vals, value)) / 2 / len(vals)
+
+    def tier(self, dim, value):
+        p = self.percentile(dim, value)
+        for name, cut in TIERS:
+            if p >= cut:
+                return name
+        return TIERS[-1][0]
+
+
+class ScoreMatrix:
+    """Shows x categories score columns (array("B")), rescored in bulk per weight set."""
+
+    def __init__(self, categories, shows=()):
+        self.categories = list(categories)
+        self.columns = {c: array("B") for c in self.categories}
+        self.missing = dict.fromkeys(self.categories, 0)
+        self.norms = array("d")  # length of each row's centred score vector
+        self.ids = []
+        self.row_of = {}
+        for s in shows:
+            self.put(s)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def put(self, show):
+        sid = show["id"]
+        scores = show.get("scores", {})
+        row = self.row_of.get(sid)
+        if row is None:
+            row = self.row_of[sid] = len(self.ids)
+            self.ids.append(sid)
+            self.norms.append(0.0)
+            for c, col in self.columns.items():
+                col.append(UNSCORED)
+                self.missing[c] += 1
+        sq = 0
+        for c, col in self.columns.items():
+            v = scores.get(c)
+            v = UNSCORED if v is None else max(0, min(100, int(v)))
+            self.missing[c] += (v == UNSCORED) - (col[row] == UNSCORED)
+            col[row] = v
+            if v != UNSCORED:
+                sq += (v - NEUTRAL_SCORE) ** 2
+        self.norms[row] = math.sqrt(sq)
+
+    def remove(self, sid):
+        row = self.row_of.pop(sid, None)
+        if row is None:
+            return
+        last = len(self.ids) - 1
+        for c, col in self.columns.items():
+            self.missing[c] -= col[row] == UNSCORED
+            col[row] = col[last]
+            col.pop()
+        self.norms[row] = self.norms[last]
+        self.norms.pop()
+        if row != last:
+            moved = self.ids[last]
+            self.ids[row] = moved
+            self.row_of[moved] = row
+        self.ids.pop()
+
+    def _centred(self, c):
+        """Column c minus NEUTRAL_SCORE, unscored entries as 0."""
+        if not self.missing[c]:
+            return [v - NEUTRAL_SCORE for v in self.columns[c]]
+        return [0 if v == UNSCORED else v - NEUTRAL_SCORE for v in self.columns[c]]
+
+    def nearest(self, sid, k=SIMILAR_K, metric="cosine"):
+        """The k shows whose score vectors are closest to sid's, as (similarity or
+        distance, id); brute force over the columns, one pass per category."""
+        row = self.row_of.get(sid)
+        if row is None or len(self.ids) < 2:
+            return []
+        if metric == "cosine" and not self.norms[row]:
+            return []  # a neutral vector has no direction
+        n = len(self.ids)
+        acc = [0.0] * n
+        for c, col in self.columns.items():
+            q = 0 if col[row] == UNSCORED else col[row] - NEUTRAL_SCORE
+            if metric == "cosine":
+                if q:
+                    acc = [a + q * v for a, v in zip(acc, self._centred(c))]
+            else:
+                acc = [a + (v - q) ** 2 for a, v in zip(acc, self._centred(c))]
+        others = (r for r in range(n) if r != row)
+        if metric == "cosine":
+            qn = self.norms[row]
+            sims = [a / (qn * nm) if nm else 0.0 for a, nm in zip(acc, self.norms)]
+            best = heapq.nlargest(k, others, key=sims.__getitem__)
+            return [(round(sims[r], 3), self.ids[r]) for r in best]
+        best = heapq.nsmallest(k, others, key=acc.__getitem__)
+        return [(round(math.sqrt(acc[r]), 1), self.ids[r]) for r in best]
+
+    def weighted(self, weights):
+        """Weighted mean (0-100, one decimal) of every row's scored categories."""
+        n = len(self.ids)
+        totals = [0.0] * n
+        wsums = [0.0] * n
+        for c, col in self.columns.items():
+            w = float(weights.get(c, 0))
+            if not w:
+                continue
+            if not self.missing[c]:
+                totals = [t + w * v for t, v in zip(totals, col)]
+                wsums = [s + w for s in wsums]
+            else:
+                totals = [t if v == UNSCORED else t + w * v for t, v in zip(totals, col)]
+                wsums = [s if v == UNSCORED else s + w for s, v in zip(wsums, col)]
+        return [round(t / s, 1) if s else 0.0 for t, s in zip(totals, wsums)]
+
+
+class PairwiseRatings:
+    """Elo ratings fitted one head-to-head result at a time.
+
+    Results are appended to a JSON-lines log, which is replayed on load. next_pair()
+    picks the comparison expected to tell us the most: close in rating and involving
+    shows that have had few comparisons so far.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.rating = {}
+        self.games = {}
+        self.count = 0
+        self.recent = deque(maxlen=PAIRWISE_RECENT)
+
+    def load(self, ids):
+        ids = set(ids)
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                    a, b, result = rec["a"], rec["b"], float(rec["result"])
+                except (ValueError, KeyError, TypeError):
+                    continue  # torn or hand-edited line
+                if a in ids and b in ids:
+                    self.update(a, b, result)
+
+    def expected(self, a, b):
+        """Probability that a beats b."""
+        ra = self.rating.get(a, ELO_START)
+        rb = self.rating.get(b, ELO_START)
+        return 1.0 / (1.0 + 10 ** ((rb - ra) / 400.0))
+
+    def _k(self, sid):
+        return max(ELO_K_MIN, ELO_K_MAX / math.sqrt(1 + self.games.get(sid, 0)))
+
+    def update(self, a, b, result):
+        """result is 1 if a won, 0 if b won, 0.5 for a tie."""
+        delta = result - self.expected(a, b)
+        self.rating[a] = self.rating.get(a, ELO_START) + self._k(a) * delta
+        self.rating[b] = self.rating.get(b, ELO_START) - self._k(b) * delta
+        self.games[a] = self.games.get(a, 0) + 1
+        self.games[b] = self.games.get(b, 0) + 1
+        self.count += 1
+        self.recent.append(frozenset((a, b)))
+
+    def record(self, a, b, result):
+        self.update(a, b, result)
+        rec = {
+            "a": a,
+            "b": b,
+            "result": result,
+            "at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+
+    def forget(self, sid):
+        self.rating.pop(sid, None)
+        self.games.pop(sid, None)
+
+    def ranking(self, ids):
+        return sorted(ids, key=lambda sid: self.rating.get(sid, ELO_START), reverse=True)
+
+    def info(self, a, b):
+        p = self.expected(a, b)
+        ua = 1.0 / math.sqrt(1 + self.games.get(a, 0))
+        ub = 1.0 / math.sqrt(1 + self.games.get(b, 0))
+        return p * (1 - p) * (ua + ub)
+
+    def next_pair(self, ids):
+        """(a, b, information) for the most useful next comparison, or None.
+
+        Only near neighbours in the current order are considered: a full ranking is
+        settled once every adjacent pair is, so far-apart pairs add little.
+        """
+        order = self.ranking(ids)
+        best = None
+        for i, a in enumerate(order):
+            for b in order[i + 1 : i + 1 + PAIRWISE_WINDOW]:
+                if frozenset((a, b)) in self.recent and len(order) > 2:
+                    continue
+                score = self.info(a, b) + random.random() * 1e-6
+                if best is None or score > best[2]:
+                    best = (a, b, score)
+        if best is not None and random.random() < 0.5:
+            best = (best[1], best[0], best[2])  # don't always show the favourite on the left
+        return best
+
+    def is_stable(self, ids):
+        pair = self.next_pair(ids)
+        return pair is None or pair[2] < PAIRWISE_STABLE_INFO
+
+
+class ScoreHistory:
+    """Append-only log of score changes, with periodic full-state checkpoints.
+
+    history.jsonl holds one line per change: {"t", "id", "d": [category index, delta,
+    ...]} plus "name" when it changed and "del" for deletions. A {"categories": [...]}
+    line gives the meaning of the indexes for the lines after it. Every
+    HISTORY_CHECKPOINT_EVERY changes the whole state is appended to the checkpoints
+    file along with the log offset it is valid at, so as_of() replays at most that
+    many lines.
+    """
+
+    def __init__(self, path, checkpoint_path, categories):
+        self.path = path
+        self.checkpoint_path = checkpoint_path
+        self.categories = list(categories)
+        self.state = {}  # id -> {"name": str, "scores": {category: value}}
+        self.checkpoints = []  # (t, log offset, checkpoint file offset), oldest first
+        self.header = None  # categories the log's latest header line declares
+        self.since_checkpoint = 0
+        self.last_t = ""
+
+    def load(self):
+        for path in (self.path, self.checkpoint_path):
+            _truncate_torn_tail(path)
+        if os.path.exists(self.checkpoint_path):
+            pos = 0
+            with open(self.checkpoint_path, "rb") as f:
+                for line in f:
+                    m = re.match(rb'\{"t":"([^"]*)","offset":(\d+)', line)
+                    if m:
+                        self.checkpoints.append((m.group(1).decode(), int(m.group(2)), pos))
+                    pos += len(line)
+        state, cats, offset = {}, None, 0
+        if self.checkpoints:
+            state, cats, offset = self._read_checkpoint(self.checkpoints[-1])
+            self.last_t = self.checkpoints[-1][0]
+        if os.path.exists(self.path):
+            with open(self.path, "rb") as f:
+                f.seek(offset)
+                cats, self.since_checkpoint, last_t = self._replay(f, state, cats)
+            self.last_t = last_t or self.last_t
+        self.state = state
+        self.header = cats
+        return self
+
+    def _read_checkpoint(self, checkpoint):
+        with open(self.checkpoint_path, "rb") as f:
+            f.seek(checkpoint[2])
+            rec = json.loads(f.readline())
+        return rec["state"], rec["categories"], rec["offset"]
+
+    @staticmethod
+    def _apply(state, rec, cats):
+        sid = rec["id"]
+        if rec.get("del"):
+            state.pop(sid, None)
+            return
+        cur = state.setdefault(sid, {"name": "", "scores": {}})
+        if "name" in rec:
+            cur["name"] = rec["name"]
+        d = rec.get("d", ())
+        for ci, diff in zip(d[::2], d[1::2]):
+            v = cur["scores"].get(cats[ci], 0) + diff
+            if v == UNSCORED:  # the category was taken off the show
+                cur["scores"].pop(cats[ci], None)
+            else:
+                cur["scores"][cats[ci]] = v
+
+    def _replay(self, f, state, cats, until=None):
+        """Apply log lines from f's position; stops before the first change after
+        `until`. Returns (categories in effect, changes applied, last timestamp)."""
+        n = 0
+        last_t = None
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            if "categories" in rec:
+                cats = rec["categories"]
+                continue
+            if until is not None and rec["t"] > until:
+                break
+            self._apply(state, rec, cats)
+            n += 1
+            last_t = rec["t"]
+        return cats, n, last_t
+
+    def _stamp(self, t=None):
+        # the log must stay in time order for replay to stop at the right line
+        self.last_t = max(t or datetime.now().strftime("%Y-%m-%d %H:%M:%S"), self.last_t)
+        return self.last_t
+
+    def _append(self, rec):
+        lines = []
+        if self.header != self.categories:
+            self.header = list(self.categories)
+            lines.append(json.dumps({"categories": self.header}, ensure_ascii=False))
+        lines.append(json.dumps(rec, separators=(",", ":"), ensure_ascii=False))
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        self._apply(self.state, rec, self.header)
+        self.since_checkpoint += 1
+        if self.since_checkpoint >= HISTORY_CHECKPOINT_EVERY:
+            self.checkpoint()
+
+    def record(self, show, t=None):
+        """Log show's scores (and name) if they differ from what the history has."""
+        sid = show["id"]
+        cur = self.state.get(sid)
+        old = cur["scores"] if cur else {}
+        new = show.get("scores", {})
+        d = []
+        for ci, c in enumerate(self.categories):
+            if c in new or c in old:
+                v = new.get(c)
+                diff = (UNSCORED if v is None else int(v)) - old.get(c, 0)
+                if diff or cur is None:  # a new show lists every score, zeros included
+                    d += [ci, diff]
+        rec = {"id": sid}
+        if d:
+            rec["d"] = d
+        if cur is None or cur["name"] != show.get("name", ""):
+            rec["name"] = show.get("name", "")
+        if len(rec) > 1:
+            self._append({"t": self._stamp(t), **rec})
+
+    def record_delete(self, sid, t=None):
+        if sid in self.state:
+            self._append({"t": self._stamp(t), "id": sid, "del": 1})
+
+    def seed(self, shows):
+        """Start history for shows the log has never seen, oldest modification first."""
+        new = [s for s in shows if s["id"] not in self.state]
+        for s in sorted(new, key=lambda s: s.get("modified", "")):
+            self.record(s, s.get("modified"))
+
+    def checkpoint(self):
+        offset = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        pos = os.path.getsize(self.checkpoint_path) if os.path.exists(self.checkpoint_path) else 0
+        rec = {"t": self.last_t, "offset": offset, "categories": self.header, "state": self.state}
+        with open(self.checkpoint_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(rec, separators=(",", ":"), ensure_ascii=False) + "\n")
+        self.checkpoints.append((self.last_t, offset, pos))
+        self.since_checkpoint = 0
+
+    def as_of(self, t):
+        """{id: {"name", "scores"}} for every show that existed at timestamp t."""
+        i = bisect_right([cp[0] for cp in self.checkpoints], t) - 1
+        if i >= 0:
+            state, cats, offset = self._read_checkpoint(self.checkpoints[i])
+        else:
+            state, cats, offset = {}, None, 0
+        if os.path.exists(self.path):
+            with open(self.path, "rb") as f:
+                f.seek(offset)
+                self._replay(f, state, cats, until=t)
+        return state
+
+    def timeline(self, sid):
+        """[(t, [(category, old, new), ...]), ...] for one show, oldest first; old or
+        new is None while the category is unscored."""
+        events = []
+        if not os.path.exists(self.path):
+            return events
+        scores = {}
+        cats = None
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue
+                if "categories" in rec:
+                    cats = rec["categories"]
+                    continue
+                if rec.get("id") != sid:
+                    continue
+                if rec.get("del"):
+                    events.append((rec["t"], [("deleted", None, None)]))
+                    scores = {}
+                    continue
+                changes = []
+                d = rec.get("d", ())
+                for ci, diff in zip(d[::2], d[1::2]):
+                    old = scores.get(cats[ci])
+                    new = (old or 0) + diff
+                    if new == UNSCORED:
+                        new = None
+                        scores.pop(cats[ci], None)
+                    else:
+                        scores[cats[ci]] = new
+                    changes.append((cats[ci], old, new))
+                if "name" in rec:
+                    changes.append(("name", None, rec["name"]))
+                events.append((rec["t"], changes))
+        return events
+
+
+def _truncate_torn_tail(path, chunk=1 << 16):
+    """Drop a half-written last line left by a crash mid-append."""
+    if not os.path.exists(path):
+        return
+    with open(path, "rb+") as f:
+        end = pos = f.seek(0, os.SEEK_END)
+        while pos > 0:
+            step = min(chunk, pos)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step)
+            if pos + step == end and data.endswith(b"\n"):
+                return
+            nl = data.rfind(b"\n")
+            if nl >= 0:
+                f.truncate(pos + nl + 1)
+                return
+        f.truncate(0)
+
 
 class ShowRankerApp:
     def __init__(self, root):
@@ -15,7 +811,14 @@ class ShowRankerApp:
         self.text_fg = "#ffffff"
         self.accent_color = "#ff6b35"
         self.highlight_color = "#ff8c69"
-        self.data_path = os.path.join("Show Ranker", "shows.json")
+        self.data_path = DATA_PATH
+        self.store = open_store(*show_stores(self.data_path))
+        self.sql = isinstance(self.store, SqliteRecordStore)
+        self.weights_path = os.path.join("Show Ranker", "weights.json")
+        self.comparisons_path = os.path.join("Show Ranker", "comparisons.jsonl")
+        self.search_path = os.path.join("Show Ranker", "search_index.json")
+        self.history_path = os.path.join("Show Ranker", "history.jsonl")
+        self.checkpoints_path = os.path.join("Show Ranker", "history_checkpoints.jsonl")
         self.categories = [
             "fights",
             "animation",
@@ -33,7 +836,23 @@ class ShowRankerApp:
             "aura farming",
             "meaning",
         ]
+        self.weights = self.load_weights()
+        # built on first use (see the properties below), so startup only reads the list
+        self._matrix = None
+        self._tiers = None
+        self._pairwise = None
+        self._history = None
+        self.read_only = False  # set when loading failed, so nothing overwrites the data
         self.shows = self.load_shows()
+        if self.sql:
+            # shows.db gets a show's overall on every save and every reweight
+            self.search_index = StoreSearch(self.store)
+        else:
+            self.rescore()
+            self.search_index = ShowSearchIndex(self.search_path).load(self.shows)
+        self._search_job = None
+        self._page_job = None
+        self.search_ids = []
         self.create_widgets()
 
     def create_widgets(self):
@@ -102,8 +921,84 @@ class ShowRankerApp:
             pady=4,
         )
         delete_btn.pack(side=tk.LEFT, padx=4)
+        weights_btn = tk.Button(
+            btn_frame,
+            text="Weights",
+            command=self.open_weights_window,
+            bg="#666666",
+            fg="white",
+            relief=tk.FLAT,
+            padx=8,
+            pady=4,
+        )
+        weights_btn.pack(side=tk.LEFT, padx=4)
+        compare_btn = tk.Button(
+            btn_frame,
+            text="Compare",
+            command=self.open_compare_window,
+            bg="#666666",
+            fg="white",
+            relief=tk.FLAT,
+            padx=8,
+            pady=4,
+        )
+        compare_btn.pack(side=tk.LEFT, padx=4)
+        tiers_btn = tk.Button(
+            btn_frame,
+            text="Tiers",
+            command=self.open_tiers_window,
+            bg="#666666",
+            fg="white",
+            relief=tk.FLAT,
+            padx=8,
+            pady=4,
+        )
+        tiers_btn.pack(side=tk.LEFT, padx=4)
+        history_btn = tk.Button(
+            btn_frame,
+            text="History",
+            command=self.open_history_window,
+            bg="#666666",
+            fg="white",
+            relief=tk.FLAT,
+            padx=8,
+            pady=4,
+        )
+        history_btn.pack(side=tk.LEFT, padx=4)
 
-        body = tk.Frame(main_frame, bg=self.bg_color)
+        search_row = tk.Frame(main_frame, bg=self.bg_color)
+        search_row.pack(fill=tk.X, padx=10, pady=(0, 6))
+        tk.Label(
+            search_row,
+            text="Search:",
+            bg=self.bg_color,
+            fg=self.text_fg,
+            font=("Arial", 10, "bold"),
+        ).pack(side=tk.LEFT)
+        self.search_var = tk.StringVar()
+        tk.Entry(
+            search_row,
+            textvariable=self.search_var,
+            bg=self.text_bg,
+            fg=self.text_fg,
+            insertbackground=self.text_fg,
+            font=("Arial", 11),
+        ).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(8, 0))
+        self.search_var.trace_add("write", lambda *a: self._schedule_search())
+        self.search_results = tk.Listbox(
+            main_frame,
+            height=6,
+            exportselection=False,
+            bg=self.text_bg,
+            fg=self.text_fg,
+            selectbackground=self.accent_color,
+            selectforeground="white",
+            font=("Arial", 10),
+        )
+        self.search_results.bind("<<ListboxSelect>>", lambda e: self._select_search_result())
+        self.search_results.bind("<Double-Button-1>", lambda e: self.open_details_selected())
+
+        body = self.body = tk.Frame(main_frame, bg=self.bg_color)
         body.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
 
         self.listbox = tk.Listbox(
@@ -142,86 +1037,278 @@ class ShowRankerApp:
         )
         self.preview_text.pack(fill=tk.BOTH, expand=True)
 
+        similar_head = tk.Frame(right_panel, bg=self.bg_color)
+        similar_head.pack(fill=tk.X, pady=(8, 4))
+        tk.Label(
+            similar_head,
+            text="Shows like this",
+            bg=self.bg_color,
+            fg=self.text_fg,
+            font=("Arial", 12, "bold"),
+        ).pack(side=tk.LEFT)
+        self.similar_metric = tk.StringVar(value="cosine")
+        metric_menu = tk.OptionMenu(
+            similar_head,
+            self.similar_metric,
+            "cosine",
+            "euclidean",
+            command=lambda _: self._update_similar(),
+        )
+        metric_menu.config(bg="#666666", fg="white", relief=tk.FLAT, highlightthickness=0)
+        metric_menu.pack(side=tk.RIGHT)
+        self.similar_list = tk.Listbox(
+            right_panel,
+            height=SIMILAR_K,
+            exportselection=False,
+            bg=self.text_bg,
+            fg=self.text_fg,
+            selectbackground=self.accent_color,
+            selectforeground="white",
+            font=("Arial", 10),
+        )
+        self.similar_list.pack(fill=tk.X)
+        self.similar_list.bind("<Double-Button-1>", lambda e: self._open_similar())
+        self.similar_ids = []
+
         self.refresh_listbox()
 
     def compute_overall(self, scores: dict) -> float:
         if not scores:
             return 0.0
-        vals = [max(0, min(100, int(scores.get(cat, 0)))) for cat in self.categories]
-        return round(sum(vals) / len(self.categories), 1)
+        total = wsum = 0.0
+        for cat in self.categories:
+            w = float(self.weights.get(cat, 0))
+            if w and cat in scores:
+                total += w * max(0, min(100, int(scores[cat])))
+                wsum += w
+        return round(total / wsum, 1) if wsum else 0.0
+
+    def rescore(self):
+        """Recompute every show's overall from the score matrix in one pass. With
+        shows.db the changed shows are put back; save_all_shows() commits them."""
+        weighted = dict(zip(self.matrix.ids, self.matrix.weighted(self.weights)))
+        changed = []
+        for show in self.shows:
+            if show.get("overall") != weighted[show["id"]]:
+                show["overall"] = weighted[show["id"]]
+                changed.append(show)
+        if self.sql:
+            for show in changed:
+                self.store.put(show)
+        self.shows.reindex()
+        if self._tiers is not None:
+            self._tiers.reset("overall", (s["overall"] for s in self.shows))
+
+    # ---------- indexes built on first use ----------
+    @property
+    def matrix(self):
+        if self._matrix is None:
+            self._matrix = ScoreMatrix(self.categories, self.shows)
+        return self._matrix
+
+    @property
+    def tiers(self):
+        if self._tiers is None:
+            self._tiers = TierIndex(self.categories, self.shows)
+        return self._tiers
+
+    @property
+    def pairwise(self):
+        if self._pairwise is None:
+            self._pairwise = PairwiseRatings(self.comparisons_path)
+            try:
+                self._pairwise.load(self.shows.ids())
+            except OSError:
+                pass
+        return self._pairwise
+
+    @property
+    def history(self):
+        if self._history is None:
+            self._history = ScoreHistory(
+                self.history_path, self.checkpoints_path, self.categories
+            )
+            try:
+                self._history.load().seed(self.shows)
+            except (OSError, ValueError, KeyError) as e:
+                messagebox.showerror("Error", f"Score history could not be read: {e}")
+        return self._history
+
+    def load_weights(self):
+        weights = dict.fromkeys(self.categories, 1.0)
+        try:
+            if os.path.exists(self.weights_path):
+                with open(self.weights_path, "r", encoding="utf-8") as f:
+                    saved = json.load(f)
+                weights.update(
+                    (c, float(w)) for c, w in saved.items() if c in weights and float(w) >= 0
+                )
+        except Exception:
+            pass
+        return weights
+
+    def save_weights(self):
+        try:
+            with open(self.weights_path, "w", encoding="utf-8") as f:
+                json.dump(self.weights, f, indent=4)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to save weights: {e}")
 
     def load_shows(self):
+        """The listbox index: every show in memory, or with shows.db just their order."""
         try:
             folder = os.path.dirname(self.data_path)
             if folder and not os.path.exists(folder):
                 os.makedirs(folder)
-            if os.path.exists(self.data_path):
-                with open(self.data_path, "r", encoding="utf-8") as f:
-                    return json.load(f)
-        except Exception:
-            pass
-        return []
+            self.store.load()
+            return StoreShowIndex(self.store) if self.sql else ShowIndex(self.store)
+        except CorruptDataError as e:
+            messagebox.showerror("Error", str(e))  # the file was moved aside; start empty
+        except Exception as e:
+            # the data is still there but unreadable right now: never save over it
+            messagebox.showerror(
+                "Error", f"Failed to load shows: {e}\nChanges won't be saved this session."
+            )
+            self.read_only = True
+            self.store = show_stores(self.data_path)[0]
+            self.sql = False
+        return ShowIndex()
 
     def save_shows(self):
+        """Append the shows changed since the last save to the store's journal."""
+        if self.read_only:
+            return
         try:
-            with open(self.data_path, "w", encoding="utf-8") as f:
-                json.dump(self.shows, f, indent=4, ensure_ascii=False)
+            self.store.flush()
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save: {e}")
 
+    def save_all_shows(self):
+        """Rewrite every show, for changes like a reweight that touch them all."""
+        if self.read_only:
+            return
+        try:
+            if self.sql:
+                self.store.flush()  # rescore() has put every show it changed
+            else:
+                self.store.save_all()
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to save: {e}")
+
+    def _list_label(self, show):
+        return f"{show.get('overall', 0):5.1f}  —  {show.get('name', '(untitled)')}"
+
     def refresh_listbox(self):
+        if self._page_job is not None:
+            self.root.after_cancel(self._page_job)
+            self._page_job = None
         self.listbox.delete(0, tk.END)
-        for show in sorted(self.shows, key=lambda s: s.get("overall", 0), reverse=True):
-            name = show.get("name", "(untitled)")
-            overall = show.get("overall", 0)
-            self.listbox.insert(tk.END, f"{overall:5.1f}  —  {name}")
+        if self.sql:
+            # same order as ShowIndex: highest overall first, then id
+            pages = self.store.pages(LIST_PAGE, order=("-overall", "id"))
+        else:
+            rows = list(self.shows.rows())
+            pages = (rows[i : i + LIST_PAGE] for i in range(0, len(rows), LIST_PAGE))
+        self._insert_pages(pages)
+
+    def _insert_pages(self, pages):
+        """Insert one page of rows now and the rest one per event-loop turn, so a
+        large collection doesn't hold up the window."""
+        self._page_job = None
+        for page in pages:
+            self.listbox.insert(tk.END, *[self._list_label(s) for s in page])
+            self._page_job = self.root.after(1, self._insert_pages, pages)
+            return
+
+    def _selected_show(self):
+        sel = self.listbox.curselection()
+        return self.shows.at(sel[0]) if sel else None
+
+    def _put_show(self, entry):
+        """Store entry and move only its listbox row."""
+        # load (and seed) the history before the edit lands, so it starts from the
+        # show's previous scores rather than the new ones
+        history = self.history
+        old = self.shows.get(entry["id"]) if self._tiers is not None else None
+        entry = self.store.put(entry)
+        if self._tiers is not None:
+            if old is not None:
+                self._tiers.remove(old)
+            self._tiers.add(entry)
+        old_row, row = self.shows.put(entry)
+        if self._matrix is not None:
+            self._matrix.put(entry)
+        self.search_index.put(entry)
+        if self.search_var.get().strip():
+            self._apply_search()
+        selected = self.listbox.curselection()
+        if self._page_job is not None:
+            # still paging the list in; start again so rows stay in index order
+            self.refresh_listbox()
+        else:
+            if old_row is not None:
+                self.listbox.delete(old_row)
+            self.listbox.insert(row, self._list_label(entry))
+        if selected and selected[0] == old_row:
+            self.listbox.selection_set(row)
+            self.listbox.see(row)
+        try:
+            history.record(entry)
+        except OSError as e:
+            messagebox.showerror("Error", f"Failed to save score history: {e}")
+        return row
+
+    def _drop_show(self, sid):
+        history = self.history  # seeded while the show still exists
+        if self._tiers is not None:
+            self._tiers.remove(self.shows.get(sid))
+        self.store.delete(sid)
+        row = self.shows.remove(sid)
+        if self._matrix is not None:
+            self._matrix.remove(sid)
+        if self._pairwise is not None:
+            self._pairwise.forget(sid)
+        self.search_index.remove(sid)
+        if self._page_job is not None:
+            self.refresh_listbox()
+        else:
+            self.listbox.delete(row)
+        try:
+            history.record_delete(sid)
+        except OSError as e:
+            messagebox.showerror("Error", f"Failed to save score history: {e}")
+        if sid in self.search_ids:
+            self._apply_search()
 
     def open_add_window(self):
         self.open_edit_window()
 
     def open_edit_selected(self):
-        sel = self.listbox.curselection()
-        if not sel:
+        current = self._selected_show()
+        if current is None:
             messagebox.showwarning("No selection", "Select a show to edit.")
             return
-        idx = sel[0]
-        current = sorted(self.shows, key=lambda s: s.get("overall", 0), reverse=True)[
-            idx
-        ]
         self.open_edit_window(current)
 
     def delete_selected(self):
-        sel = self.listbox.curselection()
-        if not sel:
+        target = self._selected_show()
+        if target is None:
             messagebox.showwarning("No selection", "Select a show to delete.")
             return
-        idx = sel[0]
-        sorted_shows = sorted(
-            self.shows, key=lambda s: s.get("overall", 0), reverse=True
-        )
-        target = sorted_shows[idx]
         confirm = messagebox.askyesno("Delete", f"Delete '{target.get('name')}'?")
         if not confirm:
             return
-        for i, s in enumerate(self.shows):
-            if s.get("id") == target.get("id"):
-                del self.shows[i]
-                break
+        self._drop_show(target["id"])
         self.save_shows()
-        self.refresh_listbox()
+        self._update_similar()
         self.preview_text.config(state=tk.NORMAL)
         self.preview_text.delete(1.0, tk.END)
         self.preview_text.config(state=tk.DISABLED)
 
     def open_details_selected(self):
-        sel = self.listbox.curselection()
-        if not sel:
+        target = self._selected_show()
+        if target is None:
             return
-        idx = sel[0]
-        sorted_shows = sorted(
-            self.shows, key=lambda s: s.get("overall", 0), reverse=True
-        )
-        target = sorted_shows[idx]
         self.show_details_window(target)
 
     def show_details_window(self, show):
@@ -285,6 +1372,17 @@ class ShowRankerApp:
             pady=4,
         )
         edit_btn.pack(side=tk.RIGHT, padx=10)
+        history_btn = tk.Button(
+            btn_frame,
+            text="History",
+            command=lambda: self.show_history_timeline(show),
+            bg="#666666",
+            fg="white",
+            relief=tk.FLAT,
+            padx=8,
+            pady=4,
+        )
+        history_btn.pack(side=tk.RIGHT, padx=(0, 10))
         close_btn = tk.Button(
             btn_frame,
             text="Close",
@@ -401,15 +1499,9 @@ class ShowRankerApp:
                 "comments": comments_text.get(1.0, tk.END).strip(),
                 "modified": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             }
-            if is_edit:
-                for i, s in enumerate(self.shows):
-                    if s.get("id") == show.get("id"):
-                        self.shows[i] = entry
-                        break
-            else:
-                self.shows.append(entry)
+            self._put_show(entry)
             self.save_shows()
-            self.refresh_listbox()
+            self._update_preview_for_selection()
             w.destroy()
 
         save_btn = tk.Button(
@@ -435,21 +1527,431 @@ class ShowRankerApp:
         )
         cancel_btn.pack(side=tk.RIGHT, pady=12)
 
+    def open_weights_window(self):
+        w = tk.Toplevel(self.root)
+        w.title("Category Weights")
+        w.geometry("420x620")
+        w.configure(bg=self.bg_color)
+        tk.Label(
+            w,
+            text="Weight per category (0 = ignore):",
+            bg=self.bg_color,
+            fg=self.text_fg,
+            font=("Arial", 10, "bold"),
+        ).pack(anchor="w", padx=12, pady=(12, 6))
+
+        grid = tk.Frame(w, bg=self.bg_color)
+        grid.pack(fill=tk.BOTH, expand=True, padx=12)
+        weight_vars = {}
+        for i, cat in enumerate(self.categories):
+            tk.Label(
+                grid,
+                text=cat.title() + ":",
+                width=18,
+                anchor="w",
+                bg=self.bg_color,
+                fg=self.text_fg,
+                font=("Arial", 10),
+            ).grid(row=i, column=0, sticky="w", pady=2)
+            wv = tk.DoubleVar(value=self.weights.get(cat, 1.0))
+            tk.Spinbox(
+                grid,
+                from_=0,
+                to=10,
+                increment=0.5,
+                textvariable=wv,
+                width=6,
+                bg=self.text_bg,
+                fg=self.text_fg,
+                relief=tk.FLAT,
+            ).grid(row=i, column=1, padx=(6, 0), pady=2)
+            weight_vars[cat] = wv
+
+        def on_apply():
+            try:
+                weights = {cat: float(weight_vars[cat].get()) for cat in self.categories}
+            except (tk.TclError, ValueError):
+                messagebox.showwarning("Invalid weight", "Weights must be numbers.", parent=w)
+                return
+            if any(v < 0 for v in weights.values()) or not any(weights.values()):
+                messagebox.showwarning(
+                    "Invalid weight",
+                    "Weights can't be negative and at least one must be above 0.",
+                    parent=w,
+                )
+                return
+            self.weights = weights
+            self.save_weights()
+            self.rescore()
+            self.save_all_shows()
+            self.refresh_listbox()
+            self._update_preview_for_selection()
+            w.destroy()
+
+        def on_reset():
+            for wv in weight_vars.values():
+                wv.set(1.0)
+
+        tk.Button(
+            w,
+            text="Apply",
+            command=on_apply,
+            bg=self.accent_color,
+            fg="white",
+            relief=tk.FLAT,
+            padx=10,
+            pady=6,
+        ).pack(side=tk.RIGHT, padx=12, pady=12)
+        tk.Button(
+            w,
+            text="Reset",
+            command=on_reset,
+            bg="#666666",
+            fg="white",
+            relief=tk.FLAT,
+            padx=10,
+            pady=6,
+        ).pack(side=tk.RIGHT, pady=12)
+
+    def open_compare_window(self):
+        if len(self.shows) < 2:
+            messagebox.showinfo("Compare", "Add at least two shows to compare them.")
+            return
+        w = tk.Toplevel(self.root)
+        w.title("Head to Head")
+        w.geometry("760x560")
+        w.configure(bg=self.bg_color)
+        tk.Label(
+            w,
+            text="Which show is better?",
+            font=("Arial", 14, "bold"),
+            bg=self.bg_color,
+            fg=self.text_fg,
+        ).pack(anchor="w", padx=12, pady=(12, 6))
+
+        duel = tk.Frame(w, bg=self.bg_color)
+        duel.pack(fill=tk.X, padx=12, pady=6)
+        choice_btns = []
+        for side in (tk.LEFT, tk.RIGHT):
+            b = tk.Button(
+                duel,
+                font=("Arial", 12, "bold"),
+                bg=self.accent_color,
+                fg="white",
+                relief=tk.FLAT,
+                wraplength=300,
+                height=3,
+            )
+            b.pack(side=side, fill=tk.X, expand=True, padx=6)
+            choice_btns.append(b)
+
+        controls = tk.Frame(w, bg=self.bg_color)
+        controls.pack(fill=tk.X, padx=12)
+        status = tk.Label(controls, bg=self.bg_color, fg=self.text_fg, font=("Arial", 10))
+        status.pack(side=tk.LEFT)
+        tie_btn = tk.Button(
+            controls, text="Too close", bg="#666666", fg="white", relief=tk.FLAT, padx=8, pady=4
+        )
+        skip_btn = tk.Button(
+            controls, text="Skip", bg="#666666", fg="white", relief=tk.FLAT, padx=8, pady=4
+        )
+        skip_btn.pack(side=tk.RIGHT, padx=4)
+        tie_btn.pack(side=tk.RIGHT, padx=4)
+
+        tk.Label(
+            w,
+            text="Head-to-head ranking:",
+            bg=self.bg_color,
+            fg=self.text_fg,
+            font=("Arial", 10, "bold"),
+        ).pack(anchor="w", padx=12, pady=(12, 4))
+        ranking = tk.Listbox(
+            w, bg=self.text_bg, fg=self.text_fg, font=("Arial", 10), activestyle="none"
+        )
+        ranking.pack(fill=tk.BOTH, expand=True, padx=12, pady=(0, 12))
+
+        state = {"pair": None}
+
+        def show_ranking():
+            ranking.delete(0, tk.END)
+            rows = []
+            for i, sid in enumerate(self.pairwise.ranking(self.shows.ids()), 1):
+                games = self.pairwise.games.get(sid, 0)
+                rating = self.pairwise.rating.get(sid, ELO_START)
+                name = self.shows.get(sid).get("name", "(untitled)")
+                rows.append(f"{i:4d}. {rating:6.0f}  ({games:3d})  {name}")
+            ranking.insert(tk.END, *rows)
+
+        def next_pair():
+            state["pair"] = pair = self.pairwise.next_pair(self.shows.ids())
+            if pair is None:
+                w.destroy()
+                return
+            for btn, sid in zip(choice_btns, pair[:2]):
+                show = self.shows.get(sid)
+                btn.config(text=f"{show.get('name', '(untitled)')}\n{show.get('overall', 0):.1f}")
+            stable = pair[2] < PAIRWISE_STABLE_INFO
+            status.config(
+                text=f"{self.pairwise.count} comparisons"
+                + ("  —  ranking looks stable" if stable else "")
+            )
+
+        def answer(result):
+            a, b, _ = state["pair"]
+            try:
+                self.pairwise.record(a, b, result)
+            except OSError as e:
+                messagebox.showerror("Error", f"Failed to save comparison: {e}", parent=w)
+            show_ranking()
+            next_pair()
+
+        choice_btns[0].config(command=lambda: answer(1.0))
+        choice_btns[1].config(command=lambda: answer(0.0))
+        tie_btn.config(command=lambda: answer(0.5))
+
+        def skip():
+            self.pairwise.recent.append(frozenset(state["pair"][:2]))
+            next_pair()
+
+        skip_btn.config(command=skip)
+        w.bind("<Left>", lambda e: answer(1.0))
+        w.bind("<Right>", lambda e: answer(0.0))
+        w.bind("<Down>", lambda e: answer(0.5))
+
+        show_ranking()
+        next_pair()
+
+    def _schedule_search(self):
+        if self._search_job is not None:
+            self.root.after_cancel(self._search_job)
+        self._search_job = self.root.after(SEARCH_DEBOUNCE_MS, self._apply_search)
+
+    def _apply_search(self):
+        self._search_job = None
+        query = self.search_var.get()
+        self.search_results.delete(0, tk.END)
+        if not query.strip():
+            self.search_ids = []
+            self.search_results.pack_forget()
+            return
+        hits = self.search_index.search(query)
+        self.search_ids = [sid for _, sid in hits]
+        rows = []
+        for score, sid in hits:
+            rows.append(f"{score:6.2f}  {self.shows.get(sid).get('name', '(untitled)')}")
+        self.search_results.insert(tk.END, *(rows or ["(no matches)"]))
+        if not self.search_results.winfo_ismapped():
+            self.search_results.pack(fill=tk.X, padx=10, pady=(0, 6), before=self.body)
+
+    def _select_search_result(self):
+        sel = self.search_results.curselection()
+        if not sel or sel[0] >= len(self.search_ids):
+            return
+        row = self.shows.row_of(self.search_ids[sel[0]])
+        self.listbox.selection_clear(0, tk.END)
+        self.listbox.selection_set(row)
+        self.listbox.see(row)
+        self._update_preview_for_selection()
+
+    def on_close(self):
+        try:
+            self.search_index.save()
+        except OSError:
+            pass
+        self.root.destroy()
+
+    def _update_similar(self):
+        self.similar_list.delete(0, tk.END)
+        s = self._selected_show()
+        metric = self.similar_metric.get()
+        hits = self.matrix.nearest(s["id"], SIMILAR_K, metric) if s else []
+        self.similar_ids = [sid for _, sid in hits]
+        fmt = "{:.0%}" if metric == "cosine" else "{:.0f}"
+        rows = []
+        for v, sid in hits:
+            rows.append(f"{fmt.format(v):>5}  {self.shows.get(sid).get('name', '(untitled)')}")
+        self.similar_list.insert(tk.END, *rows)
+
+    def _open_similar(self):
+        sel = self.similar_list.curselection()
+        if sel:
+            self.show_details_window(self.shows.get(self.similar_ids[sel[0]]))
+
+    def open_tiers_window(self):
+        w = tk.Toplevel(self.root)
+        w.title("Tier List")
+        w.geometry("820x600")
+        w.configure(bg=self.bg_color)
+        top = tk.Frame(w, bg=self.bg_color)
+        top.pack(fill=tk.X, padx=12, pady=(12, 6))
+        tk.Label(
+            top,
+            text="Tier by:",
+            bg=self.bg_color,
+            fg=self.text_fg,
+            font=("Arial", 10, "bold"),
+        ).pack(side=tk.LEFT)
+        labels = {"Overall": "overall"}
+        labels.update((c.title(), c) for c in self.categories)
+        dim_var = tk.StringVar(value="Overall")
+        dim_menu = tk.OptionMenu(top, dim_var, *labels, command=lambda _: fill())
+        dim_menu.config(bg="#666666", fg="white", relief=tk.FLAT, highlightthickness=0)
+        dim_menu.pack(side=tk.LEFT, padx=8)
+
+        outer, inner = self._make_scrollable(w)
+        outer.pack(fill=tk.BOTH, expand=True, padx=12, pady=(0, 12))
+
+        def fill():
+            for child in inner.winfo_children():
+                child.destroy()
+            dim = labels[dim_var.get()]
+            groups = {name: [] for name, _ in TIERS}
+            for show in self.shows.rows():
+                if dim == "overall":
+                    value = show.get("overall", 0)
+                elif dim in show.get("scores", {}):
+                    value = max(0, min(100, int(show["scores"][dim])))
+                else:
+                    continue
+                groups[self.tiers.tier(dim, value)].append((value, show.get("name", "")))
+            for name, _ in TIERS:
+                members = sorted(groups[name], key=lambda m: -m[0])
+                row = tk.Frame(inner, bg=self.bg_color)
+                row.pack(fill=tk.X, pady=3)
+                tk.Label(
+                    row,
+                    text=name,
+                    width=3,
+                    font=("Arial", 18, "bold"),
+                    bg=TIER_COLORS[name],
+                    fg="#222222",
+                ).pack(side=tk.LEFT, fill=tk.Y)
+                span = f"{members[-1][0]:g}–{members[0][0]:g}" if members else "—"
+                text = f"{len(members)} shows, {span}\n" + "  ·  ".join(n for _, n in members)
+                tk.Label(
+                    row,
+                    text=text,
+                    justify=tk.LEFT,
+                    anchor="w",
+                    wraplength=680,
+                    bg=self.text_bg,
+                    fg=self.text_fg,
+                    font=("Arial", 10),
+                    padx=8,
+                    pady=6,
+                ).pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        fill()
+
+    def _make_scrollable(self, parent):
+        outer = tk.Frame(parent, bg=self.bg_color)
+        canvas = tk.Canvas(outer, bg=self.bg_color, highlightthickness=0)
+        canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        sb = tk.Scrollbar(outer, command=canvas.yview)
+        sb.pack(side=tk.LEFT, fill=tk.Y)
+        canvas.configure(yscrollcommand=sb.set)
+        inner = tk.Frame(canvas, bg=self.bg_color)
+        win = canvas.create_window((0, 0), window=inner, anchor="nw")
+        inner.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
+        canvas.bind("<Configure>", lambda e: canvas.itemconfigure(win, width=e.width))
+        return outer, inner
+
+    def show_history_timeline(self, show):
+        w = tk.Toplevel(self.root)
+        w.title(f"{show.get('name', 'Show')} — History")
+        w.geometry("560x480")
+        w.configure(bg=self.bg_color)
+        text = tk.Text(
+            w, bg=self.text_bg, fg=self.text_fg, wrap=tk.WORD, font=("Arial", 10)
+        )
+        text.pack(fill=tk.BOTH, expand=True, padx=12, pady=12)
+        lines = []
+        for t, changes in self.history.timeline(show["id"]):
+            parts = []
+            for cat, old, new in changes:
+                if cat == "deleted":
+                    parts.append("deleted")
+                elif cat == "name":
+                    parts.append(f"named '{new}'")
+                else:
+                    old, new = ("—" if v is None else v for v in (old, new))
+                    parts.append(f"{cat} {old}→{new}")
+            lines.append(f"{t}\n    " + ", ".join(parts))
+        text.insert(tk.END, "\n".join(lines) or "No history recorded yet.")
+        text.config(state=tk.DISABLED)
+
+    def open_history_window(self):
+        w = tk.Toplevel(self.root)
+        w.title("Ranking As Of")
+        w.geometry("640x560")
+        w.configure(bg=self.bg_color)
+        row = tk.Frame(w, bg=self.bg_color)
+        row.pack(fill=tk.X, padx=12, pady=(12, 6))
+        tk.Label(
+            row,
+            text="Date (YYYY-MM-DD):",
+            bg=self.bg_color,
+            fg=self.text_fg,
+            font=("Arial", 10, "bold"),
+        ).pack(side=tk.LEFT)
+        date_entry = tk.Entry(row, bg=self.text_bg, fg=self.text_fg, font=("Arial", 11), width=14)
+        date_entry.pack(side=tk.LEFT, padx=(8, 8))
+        date_entry.insert(0, datetime.now().strftime("%Y-%m-%d"))
+        results = tk.Listbox(w, bg=self.text_bg, fg=self.text_fg, font=("Courier", 10))
+        results.pack(fill=tk.BOTH, expand=True, padx=12, pady=(0, 12))
+
+        def on_show():
+            raw = date_entry.get().strip()
+            try:
+                t = datetime.strptime(raw, "%Y-%m-%d").strftime("%Y-%m-%d 23:59:59")
+            except ValueError:
+                messagebox.showwarning("Invalid date", "Use YYYY-MM-DD.", parent=w)
+                return
+            state = self.history.as_of(t)
+            then = ScoreMatrix(
+                self.categories, ({"id": sid, "scores": v["scores"]} for sid, v in state.items())
+            )
+            ranked = sorted(
+                zip(then.weighted(self.weights), then.ids), key=lambda x: (-x[0], x[1])
+            )
+            lines = []
+            for rank, (overall, sid) in enumerate(ranked, 1):
+                if sid not in self.shows:
+                    move = "  gone"
+                else:
+                    delta = rank - 1 - self.shows.row_of(sid)
+                    move = f"{delta:+6d}" if delta else "     ="
+                lines.append(f"{rank:4d}. {overall:5.1f} {move}  {state[sid]['name']}")
+            results.delete(0, tk.END)
+            results.insert(tk.END, *(lines or ["No shows had been ranked by then."]))
+
+        tk.Button(
+            row,
+            text="Show",
+            command=on_show,
+            bg=self.accent_color,
+            fg="white",
+            relief=tk.FLAT,
+            padx=8,
+            pady=2,
+        ).pack(side=tk.LEFT)
+        date_entry.bind("<Return>", lambda e: on_show())
+        on_show()
+
     def _update_preview_for_selection(self):
-        sel = self.listbox.curselection()
-        if not sel:
+        s = self._selected_show()
+        self._update_similar()
+        if s is None:
             self.preview_text.config(state=tk.NORMAL)
             self.preview_text.delete(1.0, tk.END)
             self.preview_text.config(state=tk.DISABLED)
             return
-        idx = sel[0]
-        sorted_shows = sorted(
-            self.shows, key=lambda s: s.get("overall", 0), reverse=True
-        )
-        s = sorted_shows[idx]
+        overall = s.get("overall", 0)
+        pct = self.tiers.percentile("overall", overall)
         lines = [
             f"Name: {s.get('name')}",
-            f"Overall: {s.get('overall'):.1f}",
+            f"Overall: {overall:.1f}",
+            f"Tier: {self.tiers.tier('overall', overall)}  ({pct:.0%} percentile)",
             "",
             "Scores:",
         ]
@@ -464,12 +1966,30 @@ class ShowRankerApp:
         self.preview_text.config(state=tk.DISABLED)
 
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rank shows by category scores.")
+    parser.add_argument(
+        "--migrate-sqlite",
+        action="store_true",
+        help="copy shows.json into an indexed SQLite database (shows.db) and exit",
+    )
+    args = parser.parse_args(argv)
+    if args.migrate_sqlite:
+        json_store, db_store = show_stores()
+        try:
+            count = migrate_to_sqlite(json_store, db_store)
+        except (OSError, ValueError) as e:
+            print(f"error: {e}", file=sys.stderr)
+            return 1
+        print(f"copied {count} shows to {db_store.path}; {json_store.path} is kept as a backup")
+        return 0
     root = tk.Tk()
     app = ShowRankerApp(root)
     app.listbox.bind("<<ListboxSelect>>", lambda e: app._update_preview_for_selection())
+    root.protocol("WM_DELETE_WINDOW", app.on_close)
     root.mainloop()
+    app.store.close()
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -1,9 +1,18 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import json
 import os
+import sys
 from datetime import datetime
 
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from record_store import CorruptDataError, Record, RecordStore  # noqa: E402
+
+class Hobby(Record):
+    __slots__ = ("id", "name", "hours", "level", "notes")
+
 class HobbyProgressApp:
     def __init__(self, root):
         self.root = root
@@ -17,6 +26,7 @@ class HobbyProgressApp:
         self.highlight_color = "#81c784"
         
         self.data_path = os.path.join("hobby stats", "progress_data.json")
+        self.store = RecordStore(self.data_path, Hobby)
         self.hobbies = self.load_data()
         self.create_widgets()
 
@@ -45,14 +55,14 @@ class HobbyProgressApp:
 
     def load_data(self):
         try:
-            if os.path.exists(self.data_path):
-                with open(self.data_path, "r") as f: return json.load(f)
+            return list(self.store.load())
+        except CorruptDataError as e: messagebox.showerror("Error", str(e))
         except: pass
         return []
 
     def save_data(self):
         os.makedirs(os.path.dirname(self.data_path), exist_ok=True)
-        with open(self.data_path, "w") as f: json.dump(self.hobbies, f, indent=4)
+        self.store.flush()
 
     def refresh_listbox(self):
         self.listbox.delete(0, tk.END)
@@ -100,6 +110,7 @@ class HobbyProgressApp:
                 "level": level_scale.get(),
                 "notes": notes_txt.get(1.0, tk.END).strip()
             }
+            data = self.store.put(data)
             if is_edit:
                 idx = next(i for i, h in enumerate(self.hobbies) if h['id'] == hobby['id'])
                 self.hobbies[idx] = data
@@ -128,4 +139,5 @@ class HobbyProgressApp:
 if __name__ == "__main__":
     root = tk.Tk()
     app = HobbyProgressApp(root)
-    root.mainloop()
\ No newline at end of file
+    root.mainloop()
+    app.store.close()
\ No newline at end of file
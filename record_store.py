@@ -0,0 +1,758 @@
+"""Shared record store for the JSON-list apps.
+
+Each app keeps its records in a ``<name>.json`` snapshot (a plain JSON list, as
+before) plus a ``<name>.json.journal`` of single-record edits. Records are
+``__slots__`` objects that still answer to ``rec["field"]`` / ``rec.get()``, looked
+up by primary key, optionally kept in sorted secondary indexes, and only the ones
+changed since the last flush() are written.
+
+    store = RecordStore(os.path.join("Journal", "journal_entries.json"), Entry, key="date")
+    store.add_index("newest", lambda e: e["date"], reverse=True)
+    store.load()
+    store.put({"date": ..., "content": ...})
+    store.flush()
+
+SqliteRecordStore is the same interface over an embedded SQLite database, for
+large collections, with indexed queries on top; open_store() picks it once
+``<name>.db`` exists, which migrate_to_sqlite() creates from the JSON files.
+
+Apps put the repo root on sys.path themselves, so each still runs directly from
+there (python Journal/journal.py), as does run.py.
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+from bisect import bisect_left, insort
+from collections.abc import MutableMapping
+from datetime import datetime
+
+JOURNAL_COMPACT_EVERY = 200
+CURSOR_BATCH = 256
+
+
+class CorruptDataError(ValueError):
+    pass
+
+
+def atomic_write_json(path, data, **dump_kwargs):
+    folder = os.path.dirname(path) or "."
+    os.makedirs(folder, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, **dump_kwargs)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    if os.name != "nt":
+        fd = os.open(folder, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+class Record(MutableMapping):
+    """Fixed-field record with dict-style access.
+
+    Subclasses list their fields in ``__slots__``; anything else found in the data
+    (older or newer fields) goes to a per-record ``_extra`` dict that only exists when
+    needed, so it still round-trips through save/load.
+    """
+
+    __slots__ = ("_extra",)
+    FIELDS = ()
+    _FIELD_SET = frozenset()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.FIELDS = cls.FIELDS + tuple(cls.__dict__.get("__slots__", ()))
+        cls._FIELD_SET = frozenset(cls.FIELDS)
+
+    def __init__(self, data=(), **fields):
+        self._extra = None
+        for k, v in dict(data, **fields).items():
+            self[k] = v
+
+    @classmethod
+    def coerce(cls, data):
+        return data if type(data) is cls else cls(data)
+
+    def __getitem__(self, k):
+        if k in self._FIELD_SET:
+            try:
+                return getattr(self, k)
+            except AttributeError:
+                raise KeyError(k) from None
+        if self._extra is not None and k in self._extra:
+            return self._extra[k]
+        raise KeyError(k)
+
+    def __setitem__(self, k, v):
+        if k in self._FIELD_SET:
+            setattr(self, k, v)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[k] = v
+
+    def __delitem__(self, k):
+        if k in self._FIELD_SET:
+            try:
+                delattr(self, k)
+            except AttributeError:
+                raise KeyError(k) from None
+        elif self._extra is not None and k in self._extra:
+            del self._extra[k]
+        else:
+            raise KeyError(k)
+
+    def __iter__(self):
+        for f in self.FIELDS:
+            if hasattr(self, f):
+                yield f
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def get(self, k, default=None):
+        # the common path; MutableMapping's version goes through a raised KeyError
+        if k in self._FIELD_SET:
+            return getattr(self, k, default)
+        if self._extra is not None:
+            return self._extra.get(k, default)
+        return default
+
+    def to_dict(self):
+        return {k: self[k] for k in self}
+
+    def copy(self):
+        return type(self)(self.to_dict())
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class SortedIndex:
+    """Secondary index: primary keys ordered by keyfunc(record), kept with bisect.
+
+    Row 0 is the smallest key, or the largest when reverse is true, matching how the
+    apps fill their listboxes.
+    """
+
+    def __init__(self, keyfunc, reverse=False):
+        self.keyfunc = keyfunc
+        self.reverse = reverse
+        self.keys = []  # ascending (keyfunc(record), pk)
+        self.key_of = {}  # pk -> its entry in keys, so in-place edits can still be found
+
+    def build(self, records):
+        self.key_of = {pk: (self.keyfunc(r), pk) for pk, r in records.items()}
+        self.keys = sorted(self.key_of.values())
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _row(self, pos):
+        return len(self.keys) - 1 - pos if self.reverse else pos
+
+    def add(self, pk, record):
+        key = self.key_of[pk] = (self.keyfunc(record), pk)
+        insort(self.keys, key)
+        return self._row(bisect_left(self.keys, key))
+
+    def remove(self, pk):
+        key = self.key_of.pop(pk)
+        pos = bisect_left(self.keys, key)
+        row = self._row(pos)
+        del self.keys[pos]
+        return row
+
+    def row_of(self, pk):
+        return self._row(bisect_left(self.keys, self.key_of[pk]))
+
+    def at(self, row):
+        return self.keys[len(self.keys) - 1 - row if self.reverse else row][1]
+
+    def pks(self):
+        keys = reversed(self.keys) if self.reverse else self.keys
+        return [pk for _, pk in keys]
+
+
+class RecordStore:
+    """Records by primary key, persisted as a JSON snapshot plus an edit journal.
+
+    put()/delete() change memory and mark the key dirty; flush() appends the dirty
+    records to the journal in one fsynced write. Once the journal holds
+    compact_every lines it is folded into a new snapshot (on a daemon thread),
+    after rotating it to ``.compacting`` so edits made meanwhile are not lost;
+    close() waits for that thread, so call it before the process exits.
+    """
+
+    def __init__(
+        self,
+        path,
+        record_type=None,
+        key="id",
+        make_key=None,
+        journal_field="record",
+        compact_every=JOURNAL_COMPACT_EVERY,
+    ):
+        self.path = path
+        self.journal_path = path + ".journal"
+        self.compacting_path = path + ".journal.compacting"
+        self.record_type = record_type
+        self.key = key
+        # make_key(rec, n) proposes a key for a record loaded without one, or whose key
+        # is already taken; n counts up from 1 until the proposal is unused
+        self.make_key = make_key or (lambda rec, n: f"{rec.get('name', 'record')}_{n}")
+        self.journal_field = journal_field
+        self.compact_every = compact_every
+        self.records = {}
+        self.indexes = {}
+        self.dirty = {}  # pk -> record to write, or None for a deletion
+        self.journal_len = 0
+        self.lock = threading.Lock()
+        self.snapshot_lock = threading.Lock()
+        self.compacting = False
+        self.compactor = None  # background compaction thread, if one was started
+
+    # ---------- records ----------
+    def _coerce(self, rec):
+        return self.record_type.coerce(rec) if self.record_type is not None else rec
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records.values())
+
+    def __contains__(self, pk):
+        return pk in self.records
+
+    def get(self, pk, default=None):
+        return self.records.get(pk, default)
+
+    def put(self, rec):
+        """Insert or replace by primary key; returns the stored record."""
+        rec = self._coerce(rec)
+        pk = rec[self.key]
+        if pk in self.records:
+            for idx in self.indexes.values():
+                idx.remove(pk)
+        self.records[pk] = rec
+        for idx in self.indexes.values():
+            idx.add(pk, rec)
+        self.dirty[pk] = rec
+        return rec
+
+    def delete(self, pk):
+        if self.records.pop(pk, None) is None:
+            return
+        for idx in self.indexes.values():
+            idx.remove(pk)
+        self.dirty[pk] = None
+
+    # ---------- secondary indexes ----------
+    def add_index(self, name, keyfunc, reverse=False):
+        idx = self.indexes[name] = SortedIndex(keyfunc, reverse)
+        idx.build(self.records)
+        return idx
+
+    def ordered(self, name):
+        return [self.records[pk] for pk in self.indexes[name].pks()]
+
+    def at(self, name, row):
+        return self.records[self.indexes[name].at(row)]
+
+    def row_of(self, name, pk):
+        return self.indexes[name].row_of(pk)
+
+    def reindex(self, name=None):
+        """Rebuild indexes after records were changed in place without put()."""
+        for n, idx in self.indexes.items():
+            if name is None or n == name:
+                idx.build(self.records)
+
+    # ---------- persistence ----------
+    def load(self, background=True):
+        """Read the snapshot and replay the journal; raises CorruptDataError or OSError.
+
+        A leftover journal is compacted on a daemon thread, or before returning when
+        background is False (for short-lived callers).
+        """
+        folder = os.path.dirname(self.path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        records = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if not isinstance(data, list):
+                    raise ValueError("expected a JSON list")
+                if not all(isinstance(raw, dict) for raw in data):
+                    raise ValueError("expected a list of JSON objects")
+                data = [self._coerce(raw) for raw in data]
+                taken = {rec.get(self.key) for rec in data}
+            except (ValueError, TypeError) as e:
+                backup = f"{self.path}.corrupt-{datetime.now():%Y%m%d-%H%M%S}"
+                os.replace(self.path, backup)
+                raise CorruptDataError(f"{self.path} is unreadable ({e}); moved to {backup}")
+            for rec in data:
+                pk = rec.get(self.key)
+                if not pk or pk in records:
+                    pk = rec[self.key] = self._free_key(rec, taken)
+                records[pk] = rec
+        self.journal_len = 0
+        for path in (self.compacting_path, self.journal_path):
+            self.journal_len += self._replay(path, records)
+        self.records = records
+        self.dirty = {}
+        self.reindex()
+        if self.journal_len:
+            self.compact(background)
+        return self
+
+    def _free_key(self, rec, taken):
+        n = 1
+        while self.make_key(rec, n) in taken:
+            n += 1
+        key = self.make_key(rec, n)
+        taken.add(key)
+        return key
+
+    def _replay(self, path, records):
+        if not os.path.exists(path):
+            return 0
+        count = 0
+        good_end = 0
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line.decode("utf-8"))
+                except ValueError:
+                    break
+                if rec.get("op") == "put":
+                    r = self._coerce(rec[self.journal_field])
+                    records[r[self.key]] = r
+                elif rec.get("op") == "del":
+                    records.pop(rec["id"], None)
+                good_end += len(line)
+                count += 1
+        if good_end < os.path.getsize(path):
+            # torn final write from a crash; drop it so later appends start on a clean line
+            with open(path, "r+b") as f:
+                f.truncate(good_end)
+        return count
+
+    def _dump(self, rec):
+        return rec.to_dict() if isinstance(rec, Record) else rec
+
+    def flush(self):
+        """Append every record changed since the last flush to the journal."""
+        if not self.dirty:
+            return
+        lines = []
+        for pk, rec in self.dirty.items():
+            if rec is None:
+                entry = {"op": "del", "id": pk}
+            else:
+                entry = {"op": "put", self.journal_field: self._dump(rec)}
+            lines.append(json.dumps(entry, ensure_ascii=False) + "\n")
+        with self.lock:
+            with open(self.journal_path, "a", encoding="utf-8") as f:
+                f.write("".join(lines))
+                f.flush()
+                os.fsync(f.fileno())
+            self.journal_len += len(lines)
+        self.dirty = {}
+        if self.needs_compaction():
+            self.compact()
+
+    def save_all(self, records=None):
+        """Write a full snapshot and clear the journal. If records are given they
+        replace the store's contents, but only once they are safely on disk."""
+        if records is not None:
+            records = [self._coerce(r) for r in records]
+        data = list(self.records.values()) if records is None else records
+        with self.snapshot_lock, self.lock:
+            atomic_write_json(
+                self.path, [self._dump(r) for r in data], indent=4, ensure_ascii=False
+            )
+            for path in (self.compacting_path, self.journal_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            self.journal_len = 0
+        if records is not None:
+            self.records = {r[self.key]: r for r in records}
+            self.reindex()
+        self.dirty = {}
+
+    def needs_compaction(self):
+        return self.journal_len >= self.compact_every and not self.compacting
+
+    def compact(self, background=True):
+        """Fold the journal into a new snapshot of the current records."""
+        with self.lock:
+            if self.compacting:
+                return
+            self.compacting = True
+            if os.path.exists(self.journal_path):
+                if os.path.exists(self.compacting_path):
+                    with open(self.journal_path, "r", encoding="utf-8") as src, open(
+                        self.compacting_path, "a", encoding="utf-8"
+                    ) as dst:
+                        dst.write(src.read())
+                    os.remove(self.journal_path)
+                else:
+                    os.replace(self.journal_path, self.compacting_path)
+            self.journal_len = 0
+            records = list(self.records.values())
+        if background:
+            self.compactor = threading.Thread(
+                target=self._write_snapshot, args=(records,), daemon=True
+            )
+            self.compactor.start()
+        else:
+            self._write_snapshot(records)
+
+    def _write_snapshot(self, records):
+        try:
+            with self.snapshot_lock:
+                data = [self._dump(r) for r in records]
+                atomic_write_json(self.path, data, indent=4, ensure_ascii=False)
+                if os.path.exists(self.compacting_path):
+                    os.remove(self.compacting_path)
+        except OSError:
+            pass  # the rotated journal is kept and replayed on the next load
+        finally:
+            self.compacting = False
+
+    def close(self):
+        """Wait for a background compaction to finish writing the snapshot."""
+        if self.compactor is not None:
+            self.compactor.join()
+            self.compactor = None
+
+
+def sqlite_path(json_path):
+    return os.path.splitext(json_path)[0] + ".db"
+
+
+class SqliteRecordStore:
+    """Records in an embedded SQLite database instead of a JSON list.
+
+    Each record is one row holding its JSON plus copies of the fields named in
+    columns ({field: SQL type}), each indexed, so sorted listings, top-k and filters
+    run as indexed queries whose results are read from the cursor a batch at a time.
+    text_fields go into an FTS5 table for search(). put()/delete() write inside an
+    open transaction that flush() commits.
+    """
+
+    def __init__(self, path, record_type=None, key="id", columns=None, text_fields=()):
+        self.path = path
+        self.record_type = record_type
+        self.key = key
+        self.columns = dict(columns or {})
+        self.text_fields = tuple(text_fields)
+        self.fts = bool(self.text_fields)
+        self.conn = None
+        for name in self.columns:
+            if not re.fullmatch(r"[A-Za-z_]\w*", name) or name in ("pk", "data"):
+                raise ValueError(f"bad column name: {name!r}")
+
+    # ---------- records ----------
+    def _coerce(self, rec):
+        return self.record_type.coerce(rec) if self.record_type is not None else rec
+
+    def _decode(self, data):
+        return self._coerce(json.loads(data))
+
+    def column_value(self, rec, name):
+        return rec.get(name)
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def __iter__(self):
+        return self.select()
+
+    def __contains__(self, pk):
+        row = self.conn.execute("SELECT 1 FROM records WHERE pk = ?", (pk,)).fetchone()
+        return row is not None
+
+    def get(self, pk, default=None):
+        row = self.conn.execute("SELECT data FROM records WHERE pk = ?", (pk,)).fetchone()
+        return default if row is None else self._decode(row[0])
+
+    def _values(self, rec):
+        data = json.dumps(rec.to_dict() if isinstance(rec, Record) else rec, ensure_ascii=False)
+        return [data] + [self.column_value(rec, c) for c in self.columns]
+
+    def _index_text(self, rowid, rec):
+        if self.fts:
+            self.conn.execute(
+                f"INSERT INTO records_fts (rowid, {', '.join(self.text_fields)}) "
+                f"VALUES (?{', ?' * len(self.text_fields)})",
+                [rowid] + [str(rec.get(f) or "") for f in self.text_fields],
+            )
+
+    def _insert(self, rec):
+        cols = ", ".join(["pk", "data", *self.columns])
+        cur = self.conn.execute(
+            f"INSERT INTO records ({cols}) VALUES (?{', ?' * (len(self.columns) + 1)})",
+            [rec[self.key]] + self._values(rec),
+        )
+        self._index_text(cur.lastrowid, rec)
+
+    def put(self, rec):
+        """Insert or replace by primary key; returns the stored record."""
+        rec = self._coerce(rec)
+        pk = rec[self.key]
+        row = self.conn.execute("SELECT rowid FROM records WHERE pk = ?", (pk,)).fetchone()
+        if row is None:
+            self._insert(rec)
+            return rec
+        sets = ", ".join(f"{c} = ?" for c in ["data", *self.columns])
+        self.conn.execute(
+            f"UPDATE records SET {sets} WHERE rowid = ?", self._values(rec) + [row[0]]
+        )
+        if self.fts:
+            self.conn.execute("DELETE FROM records_fts WHERE rowid = ?", (row[0],))
+            self._index_text(row[0], rec)
+        return rec
+
+    def delete(self, pk):
+        row = self.conn.execute("SELECT rowid FROM records WHERE pk = ?", (pk,)).fetchone()
+        if row is None:
+            return
+        self.conn.execute("DELETE FROM records WHERE rowid = ?", (row[0],))
+        if self.fts:
+            self.conn.execute("DELETE FROM records_fts WHERE rowid = ?", (row[0],))
+
+    # ---------- queries ----------
+    def _order_sql(self, order):
+        """("-overall", "id") -> overall DESC, pk; the primary key is always the last tie-break."""
+        if isinstance(order, str):
+            order = (order,)
+        terms = []
+        for name in order:
+            desc = name.startswith("-")
+            name = name.lstrip("-")
+            if name == self.key:
+                name = "pk"
+            elif name not in self.columns:
+                raise ValueError(f"not an indexed column: {name!r}")
+            terms.append(f"{name} DESC" if desc else name)
+        if not any(t.split()[0] == "pk" for t in terms):
+            terms.append("pk")
+        return ", ".join(terms)
+
+    @staticmethod
+    def match_expr(query):
+        """FTS5 query matching every word of query as a word prefix, or None if it has none."""
+        words = re.findall(r"\w+", query.casefold())
+        return " AND ".join(f'"{w}"*' for w in words) or None
+
+    def _match_sql(self, query):
+        if not self.text_fields:
+            raise ValueError("this store has no text_fields to match against")
+        expr = self.match_expr(query)
+        if expr is None:
+            return None, []
+        if self.fts:
+            return "rowid IN (SELECT rowid FROM records_fts WHERE records_fts MATCH ?)", [expr]
+        # no FTS5 in this SQLite build: fall back to substring matches on the text fields
+        words = re.findall(r"\w+", query.casefold())
+        any_field = " OR ".join(["json_extract(data, ?) LIKE ?"] * len(self.text_fields))
+        args = []
+        for w in words:
+            for f in self.text_fields:
+                args += [f"$.{f}", f"%{w}%"]
+        return " AND ".join([f"({any_field})"] * len(words)), args
+
+    def _query(self, fields, where=None, params=(), order=None, limit=None, match=None):
+        clauses, args = [], []
+        if where:
+            clauses.append(f"({where})")
+            args.extend(params)
+        if match:
+            sql, match_args = self._match_sql(match)
+            if sql:
+                clauses.append(sql)
+                args.extend(match_args)
+        sql = f"SELECT {fields} FROM records"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        if order:
+            sql += " ORDER BY " + self._order_sql(order)
+        if limit is not None:
+            sql += " LIMIT ?"
+            args.append(int(limit))
+        return self.conn.execute(sql, args)
+
+    def select(self, where=None, params=(), order=None, limit=None, match=None):
+        """Records matching where (SQL over the indexed columns, with ? params) and,
+        if given, every word of the text query match, in order; streamed from the
+        cursor CURSOR_BATCH rows at a time."""
+        cur = self._query("data", where, params, order, limit, match)
+        while True:
+            rows = cur.fetchmany(CURSOR_BATCH)
+            if not rows:
+                return
+            for (data,) in rows:
+                yield self._decode(data)
+
+    def column_rows(self, columns, where=None, params=(), order=None):
+        """[(pk, *values of columns)] for the matching records, read from the indexed
+        columns alone, without decoding any record."""
+        for name in columns:
+            if name not in self.columns:
+                raise ValueError(f"not an indexed column: {name!r}")
+        return self._query(", ".join(["pk", *columns]), where, params, order).fetchall()
+
+    def pages(self, size, **query):
+        """select() results as lists of up to size records."""
+        page = []
+        for rec in self.select(**query):
+            page.append(rec)
+            if len(page) == size:
+                yield page
+                page = []
+        if page:
+            yield page
+
+    def count(self, where=None, params=()):
+        sql = "SELECT COUNT(*) FROM records" + (f" WHERE {where}" if where else "")
+        return self.conn.execute(sql, params).fetchone()[0]
+
+    def search(self, query, limit=None, weights=None):
+        """(score, record) best first by FTS5's BM25 (higher is better); weights
+        are per text field, in text_fields order."""
+        expr = self.match_expr(query)
+        if expr is None:
+            return []
+        if not self.fts:
+            return [(0.0, r) for r in self.select(match=query, limit=limit)]
+        weights = weights or [1.0] * len(self.text_fields)
+        sql = (
+            f"SELECT r.data, bm25(records_fts{', ?' * len(weights)}) AS rank "
+            "FROM records_fts JOIN records r ON r.rowid = records_fts.rowid "
+            "WHERE records_fts MATCH ? ORDER BY rank"
+        )
+        args = [float(w) for w in weights] + [expr]
+        if limit is not None:
+            sql += " LIMIT ?"
+            args.append(int(limit))
+        return [(-rank, self._decode(data)) for data, rank in self.conn.execute(sql, args)]
+
+    # ---------- persistence ----------
+    def load(self, background=True):
+        """Open (creating if needed) the database; raises CorruptDataError or OSError.
+        (background is accepted for RecordStore compatibility; there is no journal.)"""
+        folder = os.path.dirname(self.path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        try:
+            self.conn = sqlite3.connect(self.path)
+            self.conn.execute("PRAGMA journal_mode = WAL")
+            cols = "".join(f", {c} {t}" for c, t in self.columns.items())
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS records "
+                f"(pk TEXT PRIMARY KEY, data TEXT NOT NULL{cols})"
+            )
+            self._add_missing_columns()
+            for c in self.columns:
+                self.conn.execute(f"CREATE INDEX IF NOT EXISTS records_{c} ON records ({c}, pk)")
+            if self.fts:
+                try:
+                    self.conn.execute(
+                        "CREATE VIRTUAL TABLE IF NOT EXISTS records_fts "
+                        f"USING fts5({', '.join(self.text_fields)})"
+                    )
+                except sqlite3.OperationalError:
+                    self.fts = False
+            self.conn.commit()
+        except sqlite3.DatabaseError as e:
+            if isinstance(e, sqlite3.OperationalError):
+                raise OSError(f"{self.path}: {e}") from e
+            raise CorruptDataError(f"{self.path} is unreadable ({e})") from e
+        return self
+
+    def _add_missing_columns(self):
+        """A column added to the app after the database was created is filled in from the JSON."""
+        have = {row[1] for row in self.conn.execute("PRAGMA table_info(records)")}
+        missing = [c for c in self.columns if c not in have]
+        if not missing:
+            return
+        for c in missing:
+            self.conn.execute(f"ALTER TABLE records ADD COLUMN {c} {self.columns[c]}")
+        updates = []
+        for rowid, data in self.conn.execute("SELECT rowid, data FROM records").fetchall():
+            rec = self._decode(data)
+            updates.append([self.column_value(rec, c) for c in missing] + [rowid])
+        sets = ", ".join(f"{c} = ?" for c in missing)
+        self.conn.executemany(f"UPDATE records SET {sets} WHERE rowid = ?", updates)
+
+    def flush(self):
+        """Commit everything put or deleted since the last flush."""
+        try:
+            self.conn.commit()
+        except sqlite3.OperationalError as e:
+            raise OSError(f"{self.path}: {e}") from e
+
+    def save_all(self, records=None):
+        """Commit pending changes; if records are given they replace the table's
+        contents in the same transaction."""
+        if records is None:
+            return self.flush()
+        records = [self._coerce(r) for r in records]
+        try:
+            with self.conn:
+                self.conn.execute("DELETE FROM records")
+                if self.fts:
+                    self.conn.execute("DELETE FROM records_fts")
+                for rec in records:
+                    self._insert(rec)
+        except sqlite3.OperationalError as e:
+            raise OSError(f"{self.path}: {e}") from e
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+def open_store(json_store, db_store):
+    """db_store once its database exists (see migrate_to_sqlite), else json_store."""
+    return db_store if os.path.exists(db_store.path) else json_store
+
+
+def migrate_to_sqlite(json_store, db_store):
+    """One-shot copy of a JSON store (snapshot plus journal) into a new database.
+
+    The JSON files are left as they are, as a backup; open_store() picks the
+    database from then on. Returns the number of records copied.
+    """
+    if os.path.exists(db_store.path):
+        raise FileExistsError(f"{db_store.path} already exists")
+    if not json_store.records:
+        json_store.load(background=False)  # (a loaded store may be compacting; don't re-read)
+    records = list(json_store)
+    try:
+        db_store.load().save_all(records)
+    except BaseException:
+        db_store.close()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(db_store.path + suffix):
+                os.remove(db_store.path + suffix)
+        raise
+    return len(records)
@@ -0,0 +1,41 @@
+"""Start one of the apps that share record_store.py, from the repo root.
+
+    python run.py passport
+    python run.py passport-cli list --by overall --limit 10
+    python run.py shows [--migrate-sqlite]
+    python run.py journal | cooking | hobby
+
+A convenience launcher: each app also still runs directly from the repo root
+(python Journal/journal.py, python "Show Ranker/show_ranker.py" --migrate-sqlite,
+...), since every script puts the repo root on sys.path itself. Here the app's own
+folder goes on sys.path and the app runs as __main__ with the remaining arguments.
+Data paths stay relative to the current directory, as before.
+"""
+import os
+import runpy
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+APPS = {
+    "passport": os.path.join("Passport", "Passport.py"),
+    "passport-cli": os.path.join("Passport", "passport_cli.py"),
+    "shows": os.path.join("Show Ranker", "show_ranker.py"),
+    "journal": os.path.join("Journal", "journal.py"),
+    "cooking": os.path.join("Cooking", "Cooking.py"),
+    "hobby": os.path.join("hobby stats", "hobby.py"),
+}
+
+
+def main(argv):
+    if not argv or argv[0] not in APPS:
+        print(f"usage: python run.py {{{','.join(APPS)}}} [args...]", file=sys.stderr)
+        return 2
+    script = os.path.join(ROOT, APPS[argv[0]])
+    sys.argv = [script, *argv[1:]]
+    sys.path[:1] = [os.path.dirname(script), ROOT]
+    runpy.run_path(script, run_name="__main__")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))